@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, each worker builds on its own
+    fcntl = None
+
+ARTIFACT_FORMAT = 5
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".build.lock"
+_HASH_CHUNK = 1 << 20
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def source_fingerprint(paths: list[str]) -> tuple[str, dict[str, str]]:
+    """Combined hash of the source files, plus the per-file hashes."""
+    per_file = {os.path.basename(p): file_sha256(p) for p in paths}
+    h = hashlib.sha256(f"format={ARTIFACT_FORMAT}".encode())
+    for name in sorted(per_file):
+        h.update(f"{name}={per_file[name]}".encode())
+    return h.hexdigest(), per_file
+
+def artifact_dir(root: str, version: str) -> str:
+    return os.path.join(root, version[:16])
+
+@contextmanager
+def build_lock(root: str):
+    """Exclusive lock on `root` held across processes, so concurrent workers
+    build a missing version once instead of each computing it."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_NAME), "w") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+def load_artifacts(root: str, version: str) -> dict[str, np.ndarray] | None:
+    """Memory-map every array of `version`, or None when missing or stale."""
+    path = artifact_dir(root, version)
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != ARTIFACT_FORMAT or manifest.get("version") != version:
+        return None
+
+    try:
+        return {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in manifest.get("arrays", [])
+        }
+    except (OSError, ValueError):
+        return None
+
+def load_latest_artifacts(root: str, exclude_version: str = "") -> dict[str, np.ndarray] | None:
+    """Most recently built artifacts of any other version (for incremental refreshes)."""
+    if not os.path.isdir(root):
+        return None
+    builds = []
+    for name in os.listdir(root):
+        try:
+            with open(os.path.join(root, name, MANIFEST_NAME), encoding="utf-8") as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        version = manifest.get("version", "")
+        if manifest.get("format") == ARTIFACT_FORMAT and version and version != exclude_version:
+            builds.append((manifest.get("created_at", ""), version))
+    for _, version in sorted(builds, reverse=True):
+        arrays = load_artifacts(root, version)
+        if arrays is not None:
+            return arrays
+    return None
+
+def save_artifacts(
+    root: str,
+    version: str,
+    arrays: dict[str, np.ndarray],
+    sources: dict[str, str],
+) -> str:
+    path = artifact_dir(root, version)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(arr))
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "sources": sources,
+        "arrays": sorted(arrays),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+    return path
+
+def prune_artifacts(root: str, keep_version: str) -> list[str]:
+    keep = os.path.basename(artifact_dir(root, keep_version))
+    removed = []
+    if not os.path.isdir(root):
+        return removed
+    for name in os.listdir(root):
+        full = os.path.join(root, name)
+        if name != keep and os.path.isdir(full):
+            shutil.rmtree(full, ignore_errors=True)
+            removed.append(full)
+    return removed
@@ -10,3 +10,45 @@ APP_VERSION = "1.0.0"
 APP_DESC = "Backend for brand→artist recommendations"
 VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY", "")
 VOYAGE_MODEL = os.getenv("VOYAGE_MODEL", "voyage-3")
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "exact")  # exact | ivf | quantized
+IVF_N_LISTS = int(os.getenv("IVF_N_LISTS", "0"))  # 0 = sqrt(#rows)
+IVF_N_PROBE = int(os.getenv("IVF_N_PROBE", "8"))
+SEARCH_QUANT_DTYPE = os.getenv("SEARCH_QUANT_DTYPE", "int8")  # int8 | float16
+SEARCH_RERANK_K = int(os.getenv("SEARCH_RERANK_K", "256"))  # artists re-scored in float32; 0 = approximate only
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+EMBED_CACHE_DIR = os.getenv(
+    "EMBED_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "cache", "embeddings"),
+)  # empty string disables the on-disk tier
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+VOYAGE_TIMEOUT = float(os.getenv("VOYAGE_TIMEOUT", "10"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+PITCH_CACHE_SIZE = int(os.getenv("PITCH_CACHE_SIZE", "1024"))
+PITCH_CACHE_TTL = float(os.getenv("PITCH_CACHE_TTL", "86400"))  # seconds
+KNN_TOP_N = int(os.getenv("KNN_TOP_N", "20"))  # neighbours kept per artist
+AFFINITY_CACHE_BRANDS = int(os.getenv("AFFINITY_CACHE_BRANDS", "512"))  # lazily filled brand columns
+AFFINITY_PRECOMPUTE = os.getenv("AFFINITY_PRECOMPUTE", "0") == "1"  # dense matrix for all known brands
+ASSET_WATCH_INTERVAL = float(os.getenv("ASSET_WATCH_INTERVAL", "0"))  # seconds; 0 disables the file watch
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # X-Admin-Token for /admin; empty disables /admin
+ASSET_DIR = os.getenv(
+    "ASSET_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets"),
+)  # data/, models/ and derived/ live here
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"  # stage timings, /metrics, Server-Timing
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))  # cached GET responses; 0 disables
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "300"))  # Cache-Control max-age, seconds
+BRAND_MATCH_TOP_K = int(os.getenv("BRAND_MATCH_TOP_K", "5"))  # matchedBrands per description query
+BRAND_MATCH_MIN_SIMILARITY = float(os.getenv("BRAND_MATCH_MIN_SIMILARITY", "0.9"))  # cosine to report primaryBrand
+PAGE_CURSOR_CACHE_SIZE = int(os.getenv("PAGE_CURSOR_CACHE_SIZE", "256"))  # live pagination cursors
+PAGE_CURSOR_TTL = float(os.getenv("PAGE_CURSOR_TTL", "600"))  # seconds a cursor stays valid
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # OpenAI calls in flight per worker
+LLM_RPM = float(os.getenv("LLM_RPM", "500"))  # requests per minute per worker; 0 disables
+LLM_TPM = float(os.getenv("LLM_TPM", "200000"))  # estimated tokens per minute per worker; 0 disables
+PRECOMPUTED_TOPK = os.getenv("PRECOMPUTED_TOPK", "1") == "1"  # serve assets/precomputed when it matches the assets
+WARMUP_BATCH_SIZES = tuple(
+    int(n) for n in os.getenv("WARMUP_BATCH_SIZES", "1,8,64").split(",") if n.strip()
+)  # inference warm-up before /ready
@@ -1,30 +1,52 @@
 import os
+import threading
+import time
+from typing import Callable
 import pandas as pd
 import numpy as np
-import tensorflow as tf
+
+from .artifacts import (
+    build_lock,
+    load_artifacts,
+    load_latest_artifacts,
+    save_artifacts,
+    source_fingerprint,
+)
+from .config import ASSET_DIR, KNN_TOP_N
+from .inference import load_keras_model, load_numpy_model
+from .knn import build_knn_graph, refresh_knn_graph
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSET_ROOT = os.path.join(BASE_DIR, "..", "assets")
+ASSET_ROOT = ASSET_DIR
 DATA_DIR = os.path.join(ASSET_ROOT, "data")
 MODEL_DIR = os.path.join(ASSET_ROOT, "models")
+DERIVED_DIR = os.path.join(ASSET_ROOT, "derived")
+PRECOMPUTED_DIR = os.path.join(ASSET_ROOT, "precomputed")  # scripts.precompute_topk
 
-def l2_normalize_layer(x):
-    return tf.nn.l2_normalize(x, axis=-1)
-
-df_joined = pd.read_pickle(os.path.join(DATA_DIR, "df_joined.pkl"))
-df_persona = pd.read_pickle(os.path.join(DATA_DIR, "df_persona.pkl"))
-brand_personality = pd.read_pickle(os.path.join(DATA_DIR, "brand_personality_description.pkl"))
-
-brand_encoder = tf.keras.models.load_model(
+# files the derived arrays are computed from; their hash versions the artifacts
+ARTIFACT_SOURCES = [
+    os.path.join(DATA_DIR, "df_joined.pkl"),
     os.path.join(MODEL_DIR, "brand_encoder_model.keras"),
-    custom_objects={"l2_normalize_layer": l2_normalize_layer},
-)
-celeb_proj = tf.keras.models.load_model(
     os.path.join(MODEL_DIR, "celeb_proj_model.keras"),
-    custom_objects={"l2_normalize_layer": l2_normalize_layer},
-)
+]
+# read directly at serve time; together with ARTIFACT_SOURCES they version a snapshot
+METADATA_SOURCES = [
+    os.path.join(DATA_DIR, "df_persona.pkl"),
+    os.path.join(DATA_DIR, "brand_personality_description.pkl"),
+]
+
+def load_model(name: str, source_hashes: dict[str, str]):
+    """NumPy export of `<name>.keras` when it is up to date, else the Keras model.
 
-print(">> Data loaded.")
+    TensorFlow is only imported on the Keras fallback; see scripts.export_weights."""
+    npz_path = os.path.join(MODEL_DIR, f"{name}.npz")
+    keras_hash = source_hashes.get(f"{name}.keras")
+    if os.path.exists(npz_path):
+        model = load_numpy_model(npz_path)
+        if model.source_sha256 == keras_hash:
+            return model
+        print(f">> {name}.npz is stale; falling back to Keras (run scripts.export_weights).")
+    return load_keras_model(os.path.join(MODEL_DIR, f"{name}.keras"))
 
 CELEB_ID_COL = "artist"
 BRAND_COL = "brand"
@@ -60,22 +82,380 @@ AGE_BUCKET_COLS = [
     "60-70", "70-80", "80-90",
 ]
 
-# --- precompute celeb embeddings in brand space ---
-all_celeb_vectors = df_joined[celeb_vec_cols].to_numpy().astype(np.float32)
-all_celeb_ids = df_joined[CELEB_ID_COL].to_numpy()
+brand_feature_cols = brand_cols + demographic_cols + product_cat_cols
 
-all_celeb_embeds = celeb_proj.predict(all_celeb_vectors, verbose=0)
-all_celeb_embeds /= np.linalg.norm(all_celeb_embeds, axis=1, keepdims=True)
+def segment_starts(sorted_values: np.ndarray) -> np.ndarray:
+    """Start offsets of each run of equal values in an already grouped array."""
+    if len(sorted_values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
 
-product_matrix = (
-    df_joined[product_cat_cols]
-    .fillna(0)
-    .to_numpy()
-    .astype(np.float32)
-    if all(col in df_joined.columns for col in product_cat_cols)
-    else None
-)
-if product_matrix is not None and product_matrix.size > 0:
-    PRODUCT_BASE = np.nanmean(product_matrix, axis=0)
-else:
-    PRODUCT_BASE = np.zeros(len(product_cat_cols), dtype=np.float32)
+def load_joined_frame() -> pd.DataFrame:
+    """The full df_joined table. Only needed to (re)build the derived arrays;
+    serving reads the compact memory-mapped artifacts instead."""
+    df = pd.read_pickle(os.path.join(DATA_DIR, "df_joined.pkl"))
+    # keep each artist's rows contiguous so per-artist reductions are segmented
+    return df.sort_values(CELEB_ID_COL, kind="stable").reset_index(drop=True)
+
+def _artist_knn(
+    names: np.ndarray,
+    mean_embeds: np.ndarray,
+    artifact_version: str,
+) -> tuple[np.ndarray, np.ndarray]:
+    # reuse the previous build's graph when artists were only added
+    prev = load_latest_artifacts(DERIVED_DIR, exclude_version=artifact_version)
+    if prev is not None and prev["artist_knn_indices"].shape[1] == KNN_TOP_N:
+        pos = {name: i for i, name in enumerate(names)}
+        prev_pos = np.array([pos.get(n, -1) for n in prev["artist_names"]])
+        if (prev_pos >= 0).all() and np.allclose(
+            prev["artist_mean_embeds"], mean_embeds[prev_pos], atol=1e-6
+        ):
+            return refresh_knn_graph(
+                prev["artist_names"],
+                prev["artist_knn_indices"],
+                prev["artist_knn_scores"],
+                names,
+                mean_embeds,
+                KNN_TOP_N,
+            )
+    return build_knn_graph(mean_embeds, KNN_TOP_N)
+
+def _artist_metadata(
+    df_joined: pd.DataFrame,
+    row_starts: np.ndarray,
+    names: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Compact per-artist columns (aligned with names) that replace df_joined at serve time."""
+    n_artists = len(row_starts)
+
+    def column(col: str) -> np.ndarray:
+        if col not in df_joined.columns:
+            return np.full(len(df_joined), np.nan, dtype=np.float32)
+        return df_joined[col].to_numpy(dtype=np.float32, na_value=np.nan)
+
+    def segment_max(values: np.ndarray) -> np.ndarray:
+        if n_artists == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.maximum.reduceat(np.nan_to_num(values, nan=0.0), row_starts)
+
+    # gender: 1.0 male / 0.0 female (mean over rows >= 0.5), NaN when unknown
+    gender_vals = column("gender")
+    if "gender" in df_joined.columns and n_artists > 0:
+        gender_sum = np.add.reduceat(np.nan_to_num(gender_vals, nan=0.0), row_starts)
+        gender_cnt = np.add.reduceat(~np.isnan(gender_vals), row_starts)
+        gender_mean = np.divide(
+            gender_sum,
+            gender_cnt,
+            out=np.full(n_artists, np.nan, dtype=np.float32),
+            where=gender_cnt > 0,
+        )
+        # NaN >= 0.5 is False, so keep unknown artists out of both the M and F filters
+        gender = np.where(
+            np.isnan(gender_mean), np.nan, np.where(gender_mean >= 0.5, 1.0, 0.0)
+        ).astype(np.float32)
+    else:
+        gender = np.full(n_artists, np.nan, dtype=np.float32)
+
+    # age buckets: bit i set when AGE_BUCKET_COLS[i] reaches 1.0 on any of the artist's rows
+    age_bits = np.zeros(n_artists, dtype=np.uint8)
+    for bit, col in enumerate(AGE_BUCKET_COLS):
+        age_bits |= (segment_max(column(col)) >= 1.0).astype(np.uint8) << bit
+
+    # product categories: bit i set when the artist endorsed a product_cat_cols[i] brand
+    product_bits = np.zeros(n_artists, dtype=np.uint16)
+    for bit, col in enumerate(product_cat_cols):
+        product_bits |= (segment_max(column(col)) > 0).astype(np.uint16) << bit
+
+    # past brands, flattened: artist i owns past_brands[starts[i]:starts[i + 1]]
+    pairs = (
+        df_joined[[CELEB_ID_COL, BRAND_COL]]
+        .dropna(subset=[BRAND_COL])
+        .drop_duplicates()
+    )
+    pos = {name: i for i, name in enumerate(names)}
+    owner = np.array([pos[a] for a in pairs[CELEB_ID_COL].astype(str)], dtype=np.int64)
+    past_brand_starts = np.r_[0, np.cumsum(np.bincount(owner, minlength=n_artists))]
+
+    return {
+        "artist_gender": gender,
+        "artist_age_bits": age_bits,
+        "artist_product_bits": product_bits,
+        "artist_past_brands": pairs[BRAND_COL].to_numpy().astype(str),
+        "artist_past_brand_starts": past_brand_starts.astype(np.int64),
+    }
+
+def compute_derived_arrays(
+    brand_encoder,
+    celeb_proj,
+    artifact_version: str,
+    df_joined: pd.DataFrame | None = None,
+) -> dict[str, np.ndarray]:
+    """Everything that needs the models or df_joined, recomputed from df_joined."""
+    if df_joined is None:
+        df_joined = load_joined_frame()
+    derived: dict[str, np.ndarray] = {}
+
+    # --- celeb embeddings in brand space ---
+    celeb_vectors = df_joined[celeb_vec_cols].to_numpy().astype(np.float32)
+    celeb_embeds = celeb_proj.predict(celeb_vectors, verbose=0)
+    celeb_embeds /= np.linalg.norm(celeb_embeds, axis=1, keepdims=True)
+    derived["all_celeb_embeds"] = celeb_embeds.astype(np.float32)
+    derived["all_celeb_ids"] = df_joined[CELEB_ID_COL].to_numpy().astype(str)
+
+    # --- per-artist mean embeddings and their k-NN graph ---
+    starts = segment_starts(derived["all_celeb_ids"])
+    names = derived["all_celeb_ids"][starts]
+    if len(starts) > 0:
+        counts = np.diff(np.r_[starts, len(celeb_embeds)])
+        means = np.add.reduceat(celeb_embeds, starts, axis=0) / counts[:, None]
+        mean_norm = np.linalg.norm(means, axis=1, keepdims=True)
+        mean_norm[mean_norm == 0] = 1.0
+        means = (means / mean_norm).astype(np.float32)
+    else:
+        means = np.zeros((0, celeb_embeds.shape[1]), dtype=np.float32)
+    derived["artist_row_starts"] = starts
+    derived["artist_names"] = names
+    derived["artist_mean_embeds"] = means
+    derived["artist_knn_indices"], derived["artist_knn_scores"] = _artist_knn(
+        names, means, artifact_version
+    )
+    derived.update(_artist_metadata(df_joined, starts, names))
+
+    if all(col in df_joined.columns for col in product_cat_cols):
+        product_matrix = df_joined[product_cat_cols].fillna(0).to_numpy().astype(np.float32)
+        derived["product_matrix"] = product_matrix
+    else:
+        product_matrix = None
+    if product_matrix is not None and product_matrix.size > 0:
+        derived["PRODUCT_BASE"] = np.nanmean(product_matrix, axis=0).astype(np.float32)
+    else:
+        derived["PRODUCT_BASE"] = np.zeros(len(product_cat_cols), dtype=np.float32)
+
+    # --- brand embeddings, grouped by brand ---
+    # every distinct brand feature row is encoded once in a single batched pass,
+    # so request handlers only do a dict lookup instead of brand_encoder.predict.
+    brand_rows = (
+        df_joined[[BRAND_COL] + brand_feature_cols]
+        .dropna(subset=[BRAND_COL])
+        .drop_duplicates()
+        .sort_values(BRAND_COL, kind="stable")
+        .reset_index(drop=True)
+    )
+    brand_names = brand_rows[BRAND_COL].to_numpy().astype(str)
+    if len(brand_names) > 0:
+        brand_embeds = brand_encoder.predict(
+            brand_rows[brand_feature_cols].to_numpy().astype(np.float32),
+            verbose=0,
+        )
+        brand_norm = np.linalg.norm(brand_embeds, axis=1, keepdims=True)
+        brand_norm[brand_norm == 0] = 1.0
+        brand_embeds /= brand_norm
+        brand_starts = segment_starts(brand_names)
+    else:
+        brand_embeds = np.zeros((0, celeb_embeds.shape[1]), dtype=np.float32)
+        brand_starts = np.zeros(0, dtype=np.int64)
+    derived["brand_index_embeds"] = brand_embeds.astype(np.float32)
+    derived["brand_index_names"] = brand_names[brand_starts]
+    derived["brand_index_starts"] = brand_starts
+
+    # --- one description embedding per brand (Voyage space), for matching free text ---
+    if len(brand_starts) > 0:
+        desc_vectors = brand_rows[brand_cols].to_numpy().astype(np.float32)
+        counts = np.diff(np.r_[brand_starts, len(desc_vectors)])
+        desc_means = np.add.reduceat(desc_vectors, brand_starts, axis=0) / counts[:, None]
+        desc_norm = np.linalg.norm(desc_means, axis=1, keepdims=True)
+        desc_norm[desc_norm == 0] = 1.0
+        desc_means = desc_means / desc_norm
+    else:
+        desc_means = np.zeros((0, len(brand_cols)), dtype=np.float32)
+    derived["brand_desc_embeds"] = desc_means.astype(np.float32)
+
+    return derived
+
+def _build_shared_artifacts(
+    brand_encoder,
+    celeb_proj,
+    artifact_version: str,
+    source_hashes: dict[str, str],
+) -> dict[str, np.ndarray] | None:
+    """Build the artifacts once per box and memory-map them.
+
+    The first worker to take the lock computes and saves; the others wait,
+    then map the same files, so every worker shares one copy in the page
+    cache. Returns None when the assets directory is not writable."""
+    try:
+        with build_lock(DERIVED_DIR):
+            arrays = load_artifacts(DERIVED_DIR, artifact_version)
+            if arrays is None:
+                print(">> Derived artifacts missing or stale; building (run scripts.build_artifacts).")
+                save_artifacts(
+                    DERIVED_DIR,
+                    artifact_version,
+                    compute_derived_arrays(brand_encoder, celeb_proj, artifact_version),
+                    source_hashes,
+                )
+                arrays = load_artifacts(DERIVED_DIR, artifact_version)
+            return arrays
+    except OSError as exc:
+        print(f">> Cannot write {DERIVED_DIR} ({exc}); keeping derived arrays in process memory.")
+        return None
+
+class AssetSnapshot:
+    """One version of the data and models plus everything derived from them.
+
+    Treated as immutable: a request takes the current snapshot once and
+    keeps using it, so a reload never changes data under a running request.
+    Per-version service state (search index, profiles, affinity cache) is
+    kept in `memo` and is dropped together with the snapshot."""
+
+    def __init__(
+        self,
+        version: str,
+        artifact_version: str,
+        source_hashes: dict[str, str],
+        brand_encoder,
+        celeb_proj,
+        df_persona: pd.DataFrame,
+        brand_personality: pd.DataFrame,
+        derived_arrays: dict[str, np.ndarray],
+        derived_from_cache: bool,
+    ):
+        self.version = version
+        self.artifact_version = artifact_version
+        self.source_hashes = source_hashes
+        self.brand_encoder = brand_encoder
+        self.celeb_proj = celeb_proj
+        self.df_persona = df_persona
+        self.brand_personality = brand_personality
+        self.derived_arrays = derived_arrays
+        # True when the arrays are memory-mapped from assets/derived (shared across workers)
+        self.derived_from_cache = derived_from_cache
+        self.loaded_at = time.time()
+
+        self.all_celeb_embeds = derived_arrays["all_celeb_embeds"]
+        self.all_celeb_ids = derived_arrays["all_celeb_ids"]
+        self.product_matrix = derived_arrays.get("product_matrix")
+        self.PRODUCT_BASE = derived_arrays["PRODUCT_BASE"]
+
+        self.all_brand_embeds = derived_arrays["brand_index_embeds"]
+        brand_bounds = np.r_[derived_arrays["brand_index_starts"], len(self.all_brand_embeds)]
+        self.brand_embed_index: dict[str, np.ndarray] = {
+            str(brand): self.all_brand_embeds[brand_bounds[i]:brand_bounds[i + 1]]
+            for i, brand in enumerate(derived_arrays["brand_index_names"])
+        }
+        # L2-normalized mean description embedding per brand, aligned with brand_names
+        self.brand_names = derived_arrays["brand_index_names"]
+        self.brand_desc_embeds = derived_arrays["brand_desc_embeds"]
+
+        # --- artist segments: rows [artist_row_starts[i], artist_row_starts[i + 1]) ---
+        self.artist_row_starts = derived_arrays["artist_row_starts"]
+        self.artist_names = derived_arrays["artist_names"]
+        self.artist_mean_embeds = derived_arrays["artist_mean_embeds"]
+        self.artist_knn_indices = derived_arrays["artist_knn_indices"]
+        self.artist_knn_scores = derived_arrays["artist_knn_scores"]
+        self.artist_index: dict[str, int] = {name: i for i, name in enumerate(self.artist_names)}
+
+        # --- per-artist metadata, aligned with artist_names ---
+        self.artist_gender = derived_arrays["artist_gender"]
+        self.artist_age_bits = derived_arrays["artist_age_bits"]
+        self.artist_product_bits = derived_arrays["artist_product_bits"]
+        self.artist_past_brands = derived_arrays["artist_past_brands"]
+        self.artist_past_brand_starts = derived_arrays["artist_past_brand_starts"]
+
+        self._memo: dict = {}
+        self._memo_lock = threading.RLock()
+
+    def memo(self, key: str, factory):
+        """factory() computed once per snapshot and cached under `key`."""
+        with self._memo_lock:
+            if key not in self._memo:
+                self._memo[key] = factory()
+            return self._memo[key]
+
+def source_signature() -> tuple:
+    """Cheap (mtime, size) fingerprint of every source file, for change polling."""
+    sig = []
+    for path in ARTIFACT_SOURCES + METADATA_SOURCES:
+        try:
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((path, None, None))
+    return tuple(sig)
+
+def snapshot_version() -> str:
+    """Version id the sources on disk would load as (hashes every source file)."""
+    return source_fingerprint(ARTIFACT_SOURCES + METADATA_SOURCES)[0]
+
+def load_snapshot(progress: Callable[[str], None] | None = None) -> AssetSnapshot:
+    """Read every source file and build a complete snapshot (slow; no globals touched).
+
+    `progress(step)` is called as each loading step starts."""
+    progress = progress or (lambda step: None)
+    progress("hash_sources")
+    artifact_version, artifact_hashes = source_fingerprint(ARTIFACT_SOURCES)
+    version, source_hashes = source_fingerprint(ARTIFACT_SOURCES + METADATA_SOURCES)
+
+    progress("read_data")
+    df_persona = pd.read_pickle(os.path.join(DATA_DIR, "df_persona.pkl"))
+    brand_personality = pd.read_pickle(os.path.join(DATA_DIR, "brand_personality_description.pkl"))
+
+    progress("load_models")
+    brand_encoder = load_model("brand_encoder_model", artifact_hashes)
+    celeb_proj = load_model("celeb_proj_model", artifact_hashes)
+
+    progress("derived_arrays")
+    derived = load_artifacts(DERIVED_DIR, artifact_version)
+    if derived is None:
+        derived = _build_shared_artifacts(
+            brand_encoder, celeb_proj, artifact_version, artifact_hashes
+        )
+    from_cache = derived is not None
+    if derived is None:
+        derived = compute_derived_arrays(brand_encoder, celeb_proj, artifact_version)
+
+    print(">> Data loaded.")
+    return AssetSnapshot(
+        version,
+        artifact_version,
+        artifact_hashes,
+        brand_encoder,
+        celeb_proj,
+        df_persona,
+        brand_personality,
+        derived,
+        from_cache,
+    )
+
+_snapshot: AssetSnapshot | None = None
+_snapshot_lock = threading.Lock()
+
+def get_snapshot(progress: Callable[[str], None] | None = None) -> AssetSnapshot:
+    """The current snapshot, loaded on first use (other callers wait for that load)."""
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = load_snapshot(progress)
+    return _snapshot
+
+def current_snapshot() -> AssetSnapshot | None:
+    """The current snapshot, or None while the first load is still running."""
+    return _snapshot
+
+def swap_snapshot(snapshot: AssetSnapshot) -> AssetSnapshot | None:
+    """Make `snapshot` current; returns the one it replaced."""
+    global _snapshot
+    with _snapshot_lock:
+        previous, _snapshot = _snapshot, snapshot
+    return previous
+
+def __getattr__(name: str):
+    # module-level access (scripts, `from app.data_loader import artist_names`)
+    # resolves against the current snapshot
+    if name.startswith("__"):
+        raise AttributeError(name)
+    try:
+        return getattr(get_snapshot(), name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
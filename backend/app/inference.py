@@ -0,0 +1,122 @@
+import numpy as np
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": lambda x: 1.0 / (1.0 + np.exp(-x)),
+}
+
+def l2_normalize_layer(x):
+    import tensorflow as tf
+    return tf.nn.l2_normalize(x, axis=-1)
+
+class NumpyMLP:
+    """Inference-only stack of dense layers exported from a Keras model.
+
+    BatchNormalization is folded into the following dense layer and Dropout
+    is dropped, so a forward pass is a few matmuls. `predict` mirrors the
+    Keras signature so it can stand in for the loaded model."""
+
+    def __init__(
+        self,
+        layers: list[tuple[np.ndarray, np.ndarray, str]],
+        l2_normalize: bool,
+        source_sha256: str = "",
+    ):
+        self.layers = [
+            (np.asarray(w, dtype=np.float32), np.asarray(b, dtype=np.float32), act)
+            for w, b, act in layers
+        ]
+        self.l2_normalize = l2_normalize
+        self.source_sha256 = source_sha256
+
+    def predict(self, x, verbose: int = 0, batch_size: int | None = None) -> np.ndarray:
+        out = np.atleast_2d(np.asarray(x, dtype=np.float32))
+        for w, b, act in self.layers:
+            out = _ACTIVATIONS[act](out @ w + b)
+        if self.l2_normalize:
+            norm = np.sqrt(np.maximum(np.sum(out * out, axis=-1, keepdims=True), 1e-12))
+            out = out / norm
+        return out.astype(np.float32, copy=False)
+
+    def save(self, path: str) -> None:
+        arrays = {
+            "n_layers": np.array(len(self.layers)),
+            "l2_normalize": np.array(self.l2_normalize),
+            "source_sha256": np.array(self.source_sha256),
+        }
+        for i, (w, b, act) in enumerate(self.layers):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+            arrays[f"act{i}"] = np.array(act)
+        with open(path, "wb") as fh:
+            np.savez(fh, **arrays)
+
+def load_numpy_model(path: str) -> NumpyMLP:
+    with np.load(path) as data:
+        layers = [
+            (data[f"w{i}"], data[f"b{i}"], str(data[f"act{i}"]))
+            for i in range(int(data["n_layers"]))
+        ]
+        return NumpyMLP(
+            layers,
+            l2_normalize=bool(data["l2_normalize"]),
+            source_sha256=str(data["source_sha256"]),
+        )
+
+def load_keras_model(path: str):
+    import tensorflow as tf
+    return tf.keras.models.load_model(
+        path,
+        custom_objects={"l2_normalize_layer": l2_normalize_layer},
+    )
+
+def export_keras_model(model, source_sha256: str = "") -> NumpyMLP:
+    """Fold a Dense/BatchNormalization/Dropout/Lambda(l2) Keras model into NumPy."""
+    layers: list[tuple[np.ndarray, np.ndarray, str]] = []
+    scale = shift = None  # pending BatchNormalization affine
+    l2_normalize = False
+
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ("InputLayer", "Dropout"):
+            continue
+        if l2_normalize:
+            raise ValueError(f"Layer {layer.name} after the l2 normalization is not supported")
+
+        if kind == "Dense":
+            w, b = (layer.get_weights() + [None])[:2]
+            if b is None:
+                b = np.zeros(w.shape[1], dtype=np.float32)
+            if scale is not None:
+                b = shift @ w + b
+                w = scale[:, None] * w
+                scale = shift = None
+            layers.append((w, b, layer.get_config().get("activation", "linear")))
+        elif kind == "BatchNormalization":
+            weights = layer.get_weights()
+            gamma = weights.pop(0) if layer.scale else 1.0
+            beta = weights.pop(0) if layer.center else 0.0
+            mean, var = weights
+            bn_scale = gamma / np.sqrt(var + layer.epsilon)
+            bn_shift = beta - mean * bn_scale
+            if scale is None:
+                scale, shift = bn_scale, bn_shift
+            else:
+                scale, shift = scale * bn_scale, shift * bn_scale + bn_shift
+        elif kind == "Lambda":
+            fn_name = getattr(getattr(layer, "function", None), "__name__", "")
+            if fn_name != "l2_normalize_layer":
+                raise ValueError(f"Unsupported Lambda layer: {layer.name} ({fn_name})")
+            l2_normalize = True
+        else:
+            raise ValueError(f"Unsupported layer for NumPy export: {kind} ({layer.name})")
+
+    if scale is not None:
+        layers.append((np.diag(scale), shift, "linear"))
+
+    unknown = {act for _, _, act in layers} - set(_ACTIVATIONS)
+    if unknown:
+        raise ValueError(f"Unsupported activations: {sorted(unknown)}")
+    return NumpyMLP(layers, l2_normalize=l2_normalize, source_sha256=source_sha256)
@@ -0,0 +1,103 @@
+import numpy as np
+
+KNN_ROW_BLOCK = 1024
+KNN_COL_BLOCK = 8192
+
+def _merge_top_n(
+    idx: np.ndarray,
+    scores: np.ndarray,
+    cand_idx: np.ndarray,
+    cand_scores: np.ndarray,
+    top_n: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise merge of two candidate lists, keeping the best top_n (best first)."""
+    all_idx = np.concatenate([idx, cand_idx], axis=1)
+    all_scores = np.concatenate([scores, cand_scores], axis=1)
+    k = min(top_n, all_scores.shape[1])
+    if k < all_scores.shape[1]:
+        part = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        all_idx = np.take_along_axis(all_idx, part, axis=1)
+        all_scores = np.take_along_axis(all_scores, part, axis=1)
+    order = np.argsort(-all_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(all_idx, order, axis=1),
+        np.take_along_axis(all_scores, order, axis=1),
+    )
+
+def _knn_rows(
+    embeds: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    top_n: int,
+    init: tuple[np.ndarray, np.ndarray] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-n of embeds[rows] against embeds[cols], blocked over both axes so the
+    similarity tile never exceeds KNN_ROW_BLOCK x KNN_COL_BLOCK."""
+    out_idx = np.full((len(rows), top_n), -1, dtype=np.int64)
+    out_scores = np.full((len(rows), top_n), -np.inf, dtype=np.float32)
+    if init is not None:
+        out_idx[:], out_scores[:] = init
+
+    for r0 in range(0, len(rows), KNN_ROW_BLOCK):
+        r_ids = rows[r0:r0 + KNN_ROW_BLOCK]
+        best_idx, best_scores = out_idx[r0:r0 + len(r_ids)], out_scores[r0:r0 + len(r_ids)]
+        for c0 in range(0, len(cols), KNN_COL_BLOCK):
+            c_ids = cols[c0:c0 + KNN_COL_BLOCK]
+            sims = embeds[r_ids] @ embeds[c_ids].T
+            sims[r_ids[:, None] == c_ids[None, :]] = -np.inf
+            cand = np.broadcast_to(c_ids, sims.shape)
+            best_idx, best_scores = _merge_top_n(best_idx, best_scores, cand, sims, top_n)
+        out_idx[r0:r0 + len(r_ids)] = best_idx
+        out_scores[r0:r0 + len(r_ids)] = best_scores
+    return out_idx, out_scores
+
+def _pack(idx: np.ndarray, scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    idx = np.where(np.isfinite(scores), idx, -1)
+    return idx.astype(np.int32), np.nan_to_num(scores, neginf=-1.0).astype(np.float16)
+
+def build_knn_graph(embeds: np.ndarray, top_n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Neighbour table over L2-normalized embeddings.
+
+    Returns int32 indices (n, top_n), padded with -1, and float16 cosines."""
+    all_ids = np.arange(len(embeds))
+    return _pack(*_knn_rows(embeds, all_ids, all_ids, top_n))
+
+def refresh_knn_graph(
+    prev_names: np.ndarray,
+    prev_idx: np.ndarray,
+    prev_scores: np.ndarray,
+    names: np.ndarray,
+    embeds: np.ndarray,
+    top_n: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Update a previous table after artists were added.
+
+    Existing artists (same name, same embedding) keep their neighbours and
+    are only compared against the new artists; new artists are compared
+    against everyone. Matches build_knn_graph up to float16 rounding of the
+    carried-over scores."""
+    new_pos = {name: i for i, name in enumerate(names)}
+    old_to_new = np.array([new_pos.get(n, -1) for n in prev_names], dtype=np.int64)
+    if (old_to_new < 0).any():
+        raise ValueError("Artists were removed; rebuild the graph instead")
+
+    is_new = np.ones(len(names), dtype=bool)
+    is_new[old_to_new] = False
+    added = np.flatnonzero(is_new)
+    kept = old_to_new
+
+    idx = np.full((len(names), top_n), -1, dtype=np.int64)
+    scores = np.full((len(names), top_n), -np.inf, dtype=np.float32)
+    n_prev = min(top_n, prev_idx.shape[1])
+    prev_idx = prev_idx[:, :n_prev].astype(np.int64)
+    prev_valid = prev_idx >= 0
+    idx[kept, :n_prev] = np.where(prev_valid, old_to_new[np.where(prev_valid, prev_idx, 0)], -1)
+    scores[kept, :n_prev] = np.where(prev_valid, prev_scores[:, :n_prev].astype(np.float32), -np.inf)
+
+    if len(added) and len(kept):
+        idx[kept], scores[kept] = _knn_rows(
+            embeds, kept, added, top_n, init=(idx[kept], scores[kept])
+        )
+    if len(added):
+        idx[added], scores[added] = _knn_rows(embeds, added, np.arange(len(names)), top_n)
+    return _pack(idx, scores)
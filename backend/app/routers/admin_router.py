@@ -0,0 +1,23 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from ..config import ADMIN_TOKEN
+from ..services.assets import reload_status, start_reload
+
+def _require_admin(x_admin_token: str | None = Header(default=None)):
+    # closed unless ADMIN_TOKEN is configured
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(_require_admin)])
+
+@router.post("/reload", status_code=202)
+async def api_reload(force: bool = Query(False, description="重新載入即使來源檔案未變更")):
+    started = start_reload(force)
+    return {"started": started, **reload_status()}
+
+@router.get("/assets")
+async def api_assets():
+    return reload_status()
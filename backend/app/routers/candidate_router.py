@@ -2,27 +2,33 @@ from fastapi import APIRouter, Query
 from ..schemas import CandidateDetailResponse
 from ..services.recommend import (
     get_persona_for_artist,
-    get_past_brands_for_artist,
     get_similar_artists,
     guess_score_for_artist_brand,
 )
+from ..services.profiles import get_artist_profile
+from ..data_loader import get_snapshot
+from ..services.executor import run_inference
+from ..services.metrics import TimedRoute
 
-router = APIRouter(prefix="/candidate", tags=["candidate"])
+router = APIRouter(prefix="/candidate", tags=["candidate"], route_class=TimedRoute)
 
-@router.get("/{artist}", response_model=CandidateDetailResponse)
-def api_candidate_detail(
-    artist: str,
-    brand: str | None = Query(default=None),
-):
-    persona_text = get_persona_for_artist(artist)
-    past_brands = get_past_brands_for_artist(artist)
-    similar_list = get_similar_artists(artist, top_k=5)
+def _candidate_detail(artist: str, brand: str | None) -> dict:
+    snapshot = get_snapshot()
+    profile = get_artist_profile(artist, snapshot)
+    if profile is not None:
+        persona_text = profile["persona"]
+        past_brands = list(profile["past_brands"])
+        similar_list = profile["similar"][:5]
+    else:
+        persona_text = get_persona_for_artist(artist, snapshot)
+        past_brands = []
+        similar_list = []
 
     if brand:
-        score_val = guess_score_for_artist_brand(artist, brand)
+        score_val = guess_score_for_artist_brand(artist, brand, snapshot)
     else:
         score_val = (
-            guess_score_for_artist_brand(artist, past_brands[0])
+            guess_score_for_artist_brand(artist, past_brands[0], snapshot)
             if past_brands else
             7.5
         )
@@ -34,4 +40,11 @@ def api_candidate_detail(
         "reasonText": "",
         "pastBrands": past_brands,
         "similarArtists": similar_list,
-    }
\ No newline at end of file
+    }
+
+@router.get("/{artist}", response_model=CandidateDetailResponse)
+async def api_candidate_detail(
+    artist: str,
+    brand: str | None = Query(default=None),
+):
+    return await run_inference(_candidate_detail, artist, brand)
@@ -1,18 +1,40 @@
 from fastapi import APIRouter
-from ..services.llm import build_recommendation_pitch
-from ..schemas import ExplanationDescriptionRequest
+from fastapi.responses import StreamingResponse
+from ..services.llm import (
+    build_recommendation_pitch,
+    stream_pitch_batch,
+    stream_recommendation_pitch,
+)
+from ..schemas import ExplanationBatchRequest, ExplanationDescriptionRequest
+from ..services.metrics import TimedRoute
 
-router = APIRouter(prefix="/explanation", tags=["explanation"])
+router = APIRouter(prefix="/explanation", tags=["explanation"], route_class=TimedRoute)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def _event_stream(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/batch")
+async def api_explanation_batch(payload: ExplanationBatchRequest):
+    """Pitches for a shortlist; each `pitch` event is sent as soon as it is ready."""
+    return _event_stream(
+        stream_pitch_batch(
+            payload.brand,
+            payload.artists,
+            brand_desc_override=payload.brandDescription,
+        )
+    )
 
 @router.get("/{brand}/{artist}")
-def api_explanation(brand: str, artist: str):
-    result = build_recommendation_pitch(brand, artist)
+async def api_explanation(brand: str, artist: str):
+    result = await build_recommendation_pitch(brand, artist)
     return result
 
 @router.post("/description")
-def api_explanation_by_description(payload: ExplanationDescriptionRequest):
+async def api_explanation_by_description(payload: ExplanationDescriptionRequest):
     brand_name = payload.brandName or "品牌敘述推薦"
-    result = build_recommendation_pitch(
+    result = await build_recommendation_pitch(
         brand=brand_name,
         artist=payload.artist,
         brand_desc_override=payload.brandDescription,
@@ -20,3 +42,19 @@ def api_explanation_by_description(payload: ExplanationDescriptionRequest):
     )
     result["brand"] = brand_name
     return result
+
+@router.get("/{brand}/{artist}/stream")
+async def api_explanation_stream(brand: str, artist: str):
+    return _event_stream(stream_recommendation_pitch(brand, artist))
+
+@router.post("/description/stream")
+async def api_explanation_by_description_stream(payload: ExplanationDescriptionRequest):
+    brand_name = payload.brandName or "品牌敘述推薦"
+    return _event_stream(
+        stream_recommendation_pitch(
+            brand=brand_name,
+            artist=payload.artist,
+            brand_desc_override=payload.brandDescription,
+            match_score_override=payload.matchScore,
+        )
+    )
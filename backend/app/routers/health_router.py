@@ -1,7 +1,17 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..services.assets import startup_status
 
 router = APIRouter(tags=["health"])
 
 @router.get("/health")
-def api_health():
-    return {"status": "ok"}
\ No newline at end of file
+async def api_health():
+    """Liveness: the process is up, even while the assets are still loading."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def api_ready():
+    """Readiness: 200 once the assets are loaded and warmed, 503 with the
+    progress (or the load error, phase "failed") until then."""
+    status = startup_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,65 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..services.metrics import gauge_lines, render_metrics
+from ..services.embedding import embedding_batcher_stats, embedding_cache_stats
+from ..services.llm import pitch_cache_stats, pitch_limiter_stats
+from ..services.affinity import affinity_cache_stats
+from ..services.response_cache import response_cache_stats
+from ..services.pagination import cursor_cache_stats
+from ..services.assets import is_ready
+from ..data_loader import current_snapshot
+
+router = APIRouter(tags=["metrics"])
+
+def _counter_lines(name: str, help_text: str, values: dict[str, int]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    lines += [f'{name}{{cache="{cache}"}} {value}' for cache, value in sorted(values.items())]
+    return lines
+
+def _cache_lines() -> list[str]:
+    embed = embedding_cache_stats()
+    caches = {
+        "embedding_memory": embed["memory"],
+        "embedding_disk": embed["disk"],
+        "pitch": pitch_cache_stats(),
+        "response": response_cache_stats(),
+        "page_cursor": cursor_cache_stats(),
+    }
+    # do not wait on the first load just to report the affinity cache
+    snapshot = current_snapshot()
+    if snapshot is not None:
+        caches["affinity"] = affinity_cache_stats(snapshot)
+    return (
+        _counter_lines(
+            "starmatch_cache_hits_total", "Cache hits.",
+            {n: s["hits"] for n, s in caches.items()},
+        )
+        + _counter_lines(
+            "starmatch_cache_misses_total", "Cache misses.",
+            {n: s["misses"] for n, s in caches.items()},
+        )
+        + gauge_lines(
+            "starmatch_cache_entries", "Entries currently held per cache.", "cache",
+            {n: s["size"] for n, s in caches.items() if "size" in s},
+        )
+        + gauge_lines(
+            "starmatch_embed_batcher", "Embedding batcher totals (batches, texts, coalesced).", "kind",
+            embedding_batcher_stats(),
+        )
+        + gauge_lines(
+            "starmatch_llm_limiter", "OpenAI limiter totals (calls, coalesced, waiting, budget wait).", "kind",
+            pitch_limiter_stats(),
+        )
+        + [
+            "# HELP starmatch_ready 1 once the assets are loaded and warmed.",
+            "# TYPE starmatch_ready gauge",
+            f"starmatch_ready {int(is_ready())}",
+        ]
+    )
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def api_metrics():
+    return PlainTextResponse(
+        render_metrics(_cache_lines()),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
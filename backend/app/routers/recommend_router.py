@@ -1,19 +1,34 @@
+import asyncio
+
 from fastapi import APIRouter, Query, HTTPException
 from ..schemas import (
     RecommendationResponse,
     DescriptionRecommendRequest,
     DescriptionRecommendationResponse,
+    DescriptionPageRequest,
+    RecommendationPageResponse,
+    DescriptionRecommendationPageResponse,
+    BatchRecommendRequest,
+    BatchRecommendResponse,
 )
 from ..services.recommend import (
     recommend_artists_for_brand,
-    recommend_artists_by_description,
+    recommend_artists_by_embedding,
+    recommend_artists_batch,
+    brand_score_vector,
+    description_score_vector,
 )
-from ..services.embedding import VoyageEmbeddingError
+from ..services.context_data import get_brand_embeds
+from ..services.pagination import CursorError, CursorExpiredError, first_page, next_page
+from ..data_loader import get_snapshot
+from ..services.embedding import VoyageEmbeddingError, get_voyage_embedding_async
+from ..services.executor import run_inference
+from ..services.metrics import TimedRoute
 
-router = APIRouter(prefix="/recommendations", tags=["recommend"])
+router = APIRouter(prefix="/recommendations", tags=["recommend"], route_class=TimedRoute)
 
 @router.get("/{brand}", response_model=RecommendationResponse)
-def api_recommendations(
+async def api_recommendations(
     brand: str,
     topK: int = Query(10, ge=1, le=50),
     artistGender: str | None = Query(
@@ -22,13 +37,19 @@ def api_recommendations(
     ),
     minAge: int | None = Query(None, ge=10, le=90),
     maxAge: int | None = Query(None, ge=10, le=90),
+    productCats: list[str] | None = Query(
+        None,
+        description="只保留曾代言這些產品類別的藝人",
+    ),
 ):
-    recs = recommend_artists_for_brand(
+    recs = await run_inference(
+        recommend_artists_for_brand,
         brand_name=brand,
         top_k=topK,
         artist_gender_filter=artistGender,
         min_age=minAge,
         max_age=maxAge,
+        product_cats=productCats,
     )
     return {
         "brand": brand,
@@ -36,18 +57,23 @@ def api_recommendations(
     }
 
 @router.post("/by-description", response_model=DescriptionRecommendationResponse)
-def api_recommendations_by_description(payload: DescriptionRecommendRequest):
-    try:
-        primary_brand, matches, recs = recommend_artists_by_description(
-            description=payload.description,
+async def api_recommendations_by_description(payload: DescriptionRecommendRequest):
+    primary_brand, matches, recs = None, [], []
+    if payload.description.strip():
+        try:
+            desc_embedding = await get_voyage_embedding_async(payload.description)
+        except VoyageEmbeddingError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+        primary_brand, matches, recs = await run_inference(
+            recommend_artists_by_embedding,
+            desc_embedding,
             top_k=payload.topK,
             artist_gender_filter=payload.artistGender,
             min_age=payload.minAge,
             max_age=payload.maxAge,
             product_cats=payload.productCats,
         )
-    except VoyageEmbeddingError as exc:
-        raise HTTPException(status_code=503, detail=str(exc)) from exc
 
     return {
         "queryDescription": payload.description,
@@ -55,3 +81,138 @@ def api_recommendations_by_description(payload: DescriptionRecommendRequest):
         "matchedBrands": matches,
         "results": recs,
     }
+
+def _first_brand_page(query, brand, gender, min_age, max_age, product_cats, limit) -> dict:
+    snapshot = get_snapshot()
+    scores = brand_score_vector(brand, gender, min_age, max_age, product_cats, snapshot)
+    if scores is None:
+        return {"results": [], "total": 0, "nextCursor": None}
+    return first_page(query, scores, snapshot, limit)
+
+def _first_description_page(query, desc_embedding, gender, min_age, max_age, product_cats, limit) -> dict:
+    snapshot = get_snapshot()
+    scores = description_score_vector(desc_embedding, gender, min_age, max_age, product_cats, snapshot)
+    return first_page(query, scores, snapshot, limit)
+
+@router.get("/{brand}/pages", response_model=RecommendationPageResponse)
+async def api_recommendation_pages(
+    brand: str,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: str | None = Query(None, description="上一頁回傳的 nextCursor"),
+    artistGender: str | None = Query(None),
+    minAge: int | None = Query(None, ge=10, le=90),
+    maxAge: int | None = Query(None, ge=10, le=90),
+    productCats: list[str] | None = Query(None),
+):
+    """Deep result lists: later pages reuse the cached score vector of the first call."""
+    query = ("brand", brand, artistGender, minAge, maxAge, tuple(productCats or ()))
+    if cursor:
+        try:
+            page = await run_inference(next_page, query, cursor, limit)
+        except CursorExpiredError as exc:
+            raise HTTPException(status_code=410, detail=str(exc)) from exc
+        except CursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {"brand": brand, **page}
+
+    page = await run_inference(
+        _first_brand_page, query, brand, artistGender, minAge, maxAge, productCats, limit
+    )
+    return {"brand": brand, **page}
+
+@router.post("/by-description/pages", response_model=DescriptionRecommendationPageResponse)
+async def api_description_pages(payload: DescriptionPageRequest):
+    query = (
+        "description",
+        payload.description,
+        payload.artistGender,
+        payload.minAge,
+        payload.maxAge,
+        tuple(payload.productCats or ()),
+    )
+    if payload.cursor:
+        try:
+            page = await run_inference(next_page, query, payload.cursor, payload.limit)
+        except CursorExpiredError as exc:
+            raise HTTPException(status_code=410, detail=str(exc)) from exc
+        except CursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {"queryDescription": payload.description, **page}
+
+    if not payload.description.strip():
+        return {"queryDescription": payload.description, "results": [], "total": 0, "nextCursor": None}
+    try:
+        desc_embedding = await get_voyage_embedding_async(payload.description)
+    except VoyageEmbeddingError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    page = await run_inference(
+        _first_description_page,
+        query,
+        desc_embedding,
+        payload.artistGender,
+        payload.minAge,
+        payload.maxAge,
+        payload.productCats,
+        payload.limit,
+    )
+    return {"queryDescription": payload.description, **page}
+
+def _rank_batch(queries: list[dict]) -> tuple[list[list[dict]], list[bool]]:
+    """Batch ranking plus, per query, whether it named a brand the index lacks."""
+    snapshot = get_snapshot()
+    unknown = [
+        bool(q.get("brand_name")) and get_brand_embeds(q["brand_name"], snapshot) is None
+        for q in queries
+    ]
+    return recommend_artists_batch(queries, snapshot), unknown
+
+@router.post("/batch", response_model=BatchRecommendResponse)
+async def api_recommendations_batch(payload: BatchRecommendRequest):
+    queries, errors = [], []
+    for q in payload.queries:
+        # blank strings count as missing, here and in recommend_artists_batch
+        brand = q.brand if q.brand and q.brand.strip() else None
+        description = q.description if q.description and q.description.strip() else None
+        queries.append({
+            "brand_name": brand,
+            "top_k": q.topK,
+            "artist_gender_filter": q.artistGender,
+            "min_age": q.minAge,
+            "max_age": q.maxAge,
+            "product_cats": q.productCats,
+        })
+        errors.append(None if brand or description else "brand 或 description 必須擇一提供")
+
+    # concurrent callers are coalesced into batched Voyage calls by the batcher
+    desc_slots = [
+        i for i, query in enumerate(queries)
+        if not query["brand_name"] and errors[i] is None
+    ]
+    embeddings = await asyncio.gather(
+        *(get_voyage_embedding_async(payload.queries[i].description) for i in desc_slots),
+        return_exceptions=True,
+    )
+    for i, emb in zip(desc_slots, embeddings):
+        if isinstance(emb, VoyageEmbeddingError):
+            errors[i] = str(emb)
+        elif isinstance(emb, BaseException):
+            raise emb
+        else:
+            queries[i]["desc_embedding"] = emb
+
+    ranked, unknown = await run_inference(_rank_batch, queries)
+    for i, query in enumerate(queries):
+        if unknown[i]:
+            errors[i] = f"找不到品牌: {query['brand_name']}"
+    return {
+        "results": [
+            {
+                "brand": q.brand,
+                "description": q.description,
+                "results": recs,
+                "error": err,
+            }
+            for q, recs, err in zip(payload.queries, ranked, errors)
+        ]
+    }
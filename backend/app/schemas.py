@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class RecommendationItem(BaseModel):
     id: str
@@ -17,6 +17,43 @@ class DescriptionRecommendRequest(BaseModel):
     maxAge: int | None = None
     productCats: list[str] | None = None
 
+class DescriptionPageRequest(DescriptionRecommendRequest):
+    limit: int = Field(20, ge=1, le=200)
+    cursor: str | None = None
+
+class RecommendationPageResponse(BaseModel):
+    brand: str
+    results: list[RecommendationItem]
+    total: int
+    nextCursor: str | None
+
+class DescriptionRecommendationPageResponse(BaseModel):
+    queryDescription: str
+    results: list[RecommendationItem]
+    total: int
+    nextCursor: str | None
+
+class BatchRecommendQuery(BaseModel):
+    brand: str | None = None
+    description: str | None = None
+    topK: int = Field(10, ge=1, le=50)
+    artistGender: str | None = None
+    minAge: int | None = Field(None, ge=10, le=90)
+    maxAge: int | None = Field(None, ge=10, le=90)
+    productCats: list[str] | None = None
+
+class BatchRecommendRequest(BaseModel):
+    queries: list[BatchRecommendQuery] = Field(min_length=1, max_length=500)
+
+class BatchRecommendResult(BaseModel):
+    brand: str | None
+    description: str | None
+    results: list[RecommendationItem]
+    error: str | None = None
+
+class BatchRecommendResponse(BaseModel):
+    results: list[BatchRecommendResult]
+
 class BrandMatch(BaseModel):
     brand: str
     similarity: float
@@ -33,6 +70,11 @@ class ExplanationDescriptionRequest(BaseModel):
     matchScore: float | None = None
     brandName: str | None = None
 
+class ExplanationBatchRequest(BaseModel):
+    brand: str
+    artists: list[str] = Field(min_length=1, max_length=50)
+    brandDescription: str | None = None
+
 class CandidateDetailResponse(BaseModel):
     name: str
     score: float
@@ -0,0 +1,82 @@
+from ..config import AFFINITY_CACHE_BRANDS
+from ..data_loader import AssetSnapshot, get_snapshot
+from .cache import LRUCache
+import numpy as np
+
+_AFFINITY_CHUNK_BRANDS = 256
+
+class _AffinityStore:
+    """Per-snapshot affinity state.
+
+    columns: brand -> (n_artists,) best cosine between each artist's mean
+    embedding and any of the brand's rows; filled a whole column at a time
+    on first touch. dense: optional (n_brands, n_artists) float16 matrix
+    over every known brand."""
+
+    def __init__(self):
+        self.columns = LRUCache(AFFINITY_CACHE_BRANDS)
+        self.dense: np.ndarray | None = None
+        self.dense_pos: dict[str, int] = {}
+
+def _store(snapshot: AssetSnapshot) -> _AffinityStore:
+    return snapshot.memo("affinity", _AffinityStore)
+
+def precompute_affinity_matrix(snapshot: AssetSnapshot | None = None) -> np.ndarray:
+    """Fill the dense artist x brand matrix for every brand in the index."""
+    snapshot = snapshot or get_snapshot()
+    index = snapshot.brand_embed_index
+    artist_mean_embeds = snapshot.artist_mean_embeds
+
+    brands = list(index)
+    matrix = np.empty((len(brands), len(artist_mean_embeds)), dtype=np.float16)
+    for start in range(0, len(brands), _AFFINITY_CHUNK_BRANDS):
+        chunk = brands[start:start + _AFFINITY_CHUNK_BRANDS]
+        embeds = np.concatenate([index[b] for b in chunk])
+        bounds = np.cumsum([0] + [len(index[b]) for b in chunk[:-1]])
+        sims = np.dot(embeds, artist_mean_embeds.T)
+        matrix[start:start + len(chunk)] = np.maximum.reduceat(sims, bounds, axis=0)
+
+    store = _store(snapshot)
+    store.dense = matrix
+    store.dense_pos = {b: i for i, b in enumerate(brands)}
+    return matrix
+
+def brand_affinity_column(
+    brand_name: str,
+    snapshot: AssetSnapshot | None = None,
+) -> np.ndarray | None:
+    """Best cosine of every artist to `brand_name`, aligned with artist_names."""
+    snapshot = snapshot or get_snapshot()
+    store = _store(snapshot)
+    pos = store.dense_pos.get(brand_name)
+    if pos is not None and store.dense is not None:
+        return store.dense[pos]
+
+    col = store.columns.get(brand_name)
+    if col is None:
+        brand_embeds = snapshot.brand_embed_index.get(brand_name)
+        if brand_embeds is None or len(brand_embeds) == 0:
+            return None
+        col = np.dot(snapshot.artist_mean_embeds, brand_embeds.T).max(axis=1).astype(np.float32)
+        store.columns.set(brand_name, col)
+    return col
+
+def artist_brand_affinity(
+    artist_name: str,
+    brand_name: str,
+    snapshot: AssetSnapshot | None = None,
+) -> float | None:
+    snapshot = snapshot or get_snapshot()
+    idx = snapshot.artist_index.get(artist_name)
+    if idx is None:
+        return None
+    col = brand_affinity_column(brand_name, snapshot)
+    if col is None:
+        return None
+    return float(col[idx])
+
+def affinity_cache_stats(snapshot: AssetSnapshot | None = None) -> dict:
+    store = _store(snapshot or get_snapshot())
+    stats = store.columns.stats()
+    stats["dense_brands"] = len(store.dense_pos)
+    return stats
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+
+from ..config import AFFINITY_PRECOMPUTE, WARMUP_BATCH_SIZES
+from ..data_loader import (
+    AssetSnapshot,
+    brand_feature_cols,
+    celeb_vec_cols,
+    get_snapshot,
+    load_snapshot,
+    snapshot_version,
+    source_signature,
+    swap_snapshot,
+)
+from .affinity import precompute_affinity_matrix
+from .precomputed import get_topk_store, topk_store_stats
+from .profiles import get_artist_profiles
+from .search import get_search_backend
+
+_reload_lock = threading.Lock()
+_reload_state = {
+    "running": False,
+    "last_started_at": None,
+    "last_finished_at": None,
+    "last_result": None,
+    "last_error": None,
+}
+
+# called as fn(new, previous) right after a swap, for caches keyed on the asset version
+_swap_listeners: list[Callable[[AssetSnapshot, AssetSnapshot | None], None]] = []
+
+def add_swap_listener(fn: Callable[[AssetSnapshot, AssetSnapshot | None], None]) -> None:
+    _swap_listeners.append(fn)
+
+def warm_up_inference(snapshot: AssetSnapshot, batch_sizes=WARMUP_BATCH_SIZES) -> None:
+    """Run both models and the similarity scan once per batch size, so lazy
+    initialisation (BLAS thread pools, Keras tracing when a model has no
+    NumPy export) happens before the first real request."""
+    backend = get_search_backend(snapshot)
+    for n in batch_sizes:
+        brand_embeds = snapshot.brand_encoder.predict(
+            np.zeros((n, len(brand_feature_cols)), dtype=np.float32), verbose=0
+        )
+        snapshot.celeb_proj.predict(np.zeros((n, len(celeb_vec_cols)), dtype=np.float32), verbose=0)
+        backend.artist_scores(brand_embeds)
+
+def warm_snapshot(
+    snapshot: AssetSnapshot,
+    progress: Callable[[str], None] | None = None,
+) -> None:
+    """Build the per-snapshot service state up front, so the first requests
+    after a swap do not pay for the search index or the profile table."""
+    progress = progress or (lambda step: None)
+    progress("search_index")
+    get_search_backend(snapshot)
+    progress("profiles")
+    get_artist_profiles(snapshot)
+    progress("topk_store")
+    get_topk_store(snapshot)
+    if AFFINITY_PRECOMPUTE:
+        progress("affinity")
+        precompute_affinity_matrix(snapshot)
+    progress("warm_up")
+    warm_up_inference(snapshot)
+
+# load_snapshot + warm_snapshot steps, in order, for the readiness progress
+STARTUP_STEPS = [
+    "hash_sources", "read_data", "load_models", "derived_arrays",
+    "search_index", "profiles", "topk_store", "affinity", "warm_up",
+]
+
+_startup_state = {
+    "phase": "pending",  # pending -> loading -> ready | failed
+    "step": None,
+    "steps": [],
+    "started_at": None,
+    "ready_at": None,
+    "error": None,
+}
+
+def _startup_progress(step: str | None) -> None:
+    now = time.time()
+    steps = _startup_state["steps"]
+    if steps and steps[-1]["seconds"] is None:
+        steps[-1]["seconds"] = round(now - steps[-1]["started_at"], 3)
+    if step is not None:
+        steps.append({"name": step, "started_at": now, "seconds": None})
+    _startup_state["step"] = step
+
+def load_and_warm() -> None:
+    """Load the first snapshot and warm it, recording progress for /ready."""
+    _startup_state.update(phase="loading", started_at=time.time(), error=None)
+    try:
+        snapshot = get_snapshot(_startup_progress)
+        warm_snapshot(snapshot, _startup_progress)
+    except Exception as exc:
+        _startup_progress(None)
+        _startup_state.update(phase="failed", error=repr(exc))
+        print(f">> Startup load failed: {exc!r}")
+        raise
+    _startup_progress(None)
+    _startup_state.update(phase="ready", ready_at=time.time())
+    print(f">> Ready in {_startup_state['ready_at'] - _startup_state['started_at']:.1f}s")
+
+def start_background_load() -> None:
+    """Run load_and_warm on a thread so the server answers /health right away."""
+    # set before the thread starts, so no request slips past NotReadyMiddleware
+    _startup_state["phase"] = "loading"
+
+    def run():
+        try:
+            load_and_warm()
+        except Exception:
+            pass  # recorded in the startup state; /ready keeps returning 503
+
+    threading.Thread(target=run, name="asset-load", daemon=True).start()
+
+def is_ready() -> bool:
+    return _startup_state["phase"] == "ready"
+
+def startup_status() -> dict:
+    planned = [s for s in STARTUP_STEPS if s != "affinity" or AFFINITY_PRECOMPUTE]
+    done = sum(1 for step in _startup_state["steps"] if step["seconds"] is not None)
+    return {
+        "ready": is_ready(),
+        "phase": _startup_state["phase"],
+        "step": _startup_state["step"],
+        "progress": 1.0 if is_ready() else round(min(done / len(planned), 1.0), 3),
+        "steps": [
+            {"name": step["name"], "seconds": step["seconds"]}
+            for step in _startup_state["steps"]
+        ],
+        "started_at": _startup_state["started_at"],
+        "ready_at": _startup_state["ready_at"],
+        "error": _startup_state["error"],
+    }
+
+def reload_assets(force: bool = False) -> dict:
+    """Load and warm a new snapshot, then swap it in.
+
+    Requests already running keep the snapshot they started with. On any
+    error the current snapshot stays in place. Only one reload runs at a time."""
+    if not _reload_lock.acquire(blocking=False):
+        return {"status": "busy"}
+    return _reload_locked(force)
+
+def _reload_locked(force: bool) -> dict:
+    """Body of reload_assets; the caller holds _reload_lock, released here."""
+    _reload_state.update(running=True, last_started_at=time.time(), last_error=None)
+    try:
+        current = get_snapshot()
+        if not force and snapshot_version() == current.version:
+            result = {"status": "unchanged", "version": current.version}
+        else:
+            snapshot = load_snapshot()
+            warm_snapshot(snapshot)
+            previous = swap_snapshot(snapshot)
+            for fn in _swap_listeners:
+                fn(snapshot, previous)
+            result = {
+                "status": "reloaded",
+                "version": snapshot.version,
+                "previous_version": previous.version if previous is not None else None,
+            }
+            print(f">> Assets reloaded: {result['previous_version']} -> {snapshot.version}")
+    except Exception as exc:
+        result = {"status": "failed", "error": repr(exc)}
+        _reload_state["last_error"] = repr(exc)
+        print(f">> Asset reload failed; keeping the current snapshot: {exc!r}")
+    finally:
+        _reload_state.update(running=False, last_finished_at=time.time())
+        _reload_lock.release()
+    _reload_state["last_result"] = result
+    return result
+
+def start_reload(force: bool = False) -> bool:
+    """Run reload_assets on a background thread; False when one is already running.
+
+    The lock is taken here and handed to the thread, so two callers cannot
+    both be told a reload started."""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(
+            target=_reload_locked, args=(force,), name="asset-reload", daemon=True
+        ).start()
+    except BaseException:
+        _reload_lock.release()
+        raise
+    return True
+
+def reload_status() -> dict:
+    snapshot = get_snapshot()
+    return {
+        "version": snapshot.version,
+        "artifact_version": snapshot.artifact_version,
+        "loaded_at": snapshot.loaded_at,
+        "derived_from_cache": snapshot.derived_from_cache,
+        "precomputed_topk": topk_store_stats(snapshot),
+        "reload": dict(_reload_state),
+    }
+
+async def watch_assets(interval: float) -> None:
+    """Poll the source files and reload once a change has settled.
+
+    A change must look the same on two consecutive polls before it is
+    loaded, so a pickle that is still being copied is not read half-written."""
+    loaded = source_signature()
+    pending = None
+    while True:
+        await asyncio.sleep(interval)
+        seen = await asyncio.to_thread(source_signature)
+        if seen == loaded:
+            pending = None
+        elif seen == pending:
+            if start_reload():
+                loaded, pending = seen, None
+        else:
+            pending = seen
+
+# answered before the assets are ready; everything else would wait on the snapshot lock
+_NOT_READY_EXEMPT = ("/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+class NotReadyMiddleware:
+    """503 + Retry-After for API calls until the background load is done
+    (pending, loading or failed), instead of parking them, and the event
+    loop, on a synchronous load under the snapshot lock."""
+
+    def __init__(self, app, retry_after: int = 5):
+        self.app = app
+        self.retry_after = str(retry_after).encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or _startup_state["phase"] == "ready"
+            or scope["path"].startswith(_NOT_READY_EXEMPT)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = startup_status()
+        detail = "資料載入失敗" if status["phase"] == "failed" else "服務啟動中，資料尚未載入完成"
+        body = json.dumps({"detail": detail, **status}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+class RateBudget:
+    """Requests- and tokens-per-minute budget as two token buckets.
+
+    `acquire(tokens)` waits until both buckets have room, then spends one
+    request and `tokens` tokens. Waiters are served in arrival order, so a
+    large request is not starved by small ones. A limit <= 0 disables that
+    bucket."""
+
+    def __init__(self, rpm: float, tpm: float, clock: Callable[[], float] = time.monotonic):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.clock = clock
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = clock()
+        self._lock: asyncio.Lock | None = None
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm > 0:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm > 0:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _wait_time(self, tokens: float) -> float:
+        wait = 0.0
+        if self.rpm > 0 and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+        if self.tpm > 0 and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        if self.rpm <= 0 and self.tpm <= 0:
+            self.acquired += 1
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # a request larger than the whole bucket would never fit; let it drain the bucket
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else 0
+
+        async with self._lock:
+            start = self.clock()
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm > 0:
+                self._requests -= 1
+            if self.tpm > 0:
+                self._tokens -= tokens
+            self.acquired += 1
+            self.waited_seconds += self.clock() - start
+
+    def stats(self) -> dict:
+        return {"acquired": self.acquired, "waited_seconds": round(self.waited_seconds, 3)}
+
+class SingleFlight:
+    """Concurrent calls with the same key share one running task.
+
+    The task is shielded, so a caller that is cancelled (e.g. the client
+    disconnected) does not cancel the call for the others, and its result
+    can still be cached by the function itself."""
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
@@ -1,43 +1,75 @@
 from ..data_loader import (
-    df_joined,
-    df_persona,
-    brand_personality,
-    all_celeb_ids,
-    all_celeb_embeds,
-    brand_encoder,
-    CELEB_ID_COL,
-    BRAND_COL,
-    AGE_BUCKET_COLS,
+    AssetSnapshot,
+    get_snapshot,
     brand_cols,
     demographic_cols,
     product_cat_cols,
 )
+from .search import (
+    get_search_backend,
+    top_k_indices,
+    top_k_indices_batch,
+)
+from .profiles import get_artist_profile, get_persona_by_artist
+from .affinity import artist_brand_affinity
+from .metrics import span
 import numpy as np
-import pandas as pd
 
-def encode_brand_feature_row(row: pd.Series) -> np.ndarray:
-    vec = row[brand_cols + demographic_cols + product_cat_cols] \
-        .to_numpy() \
-        .astype(np.float32)
-    return vec.reshape(1, -1)
+def get_brand_embeds(
+    brand_name: str,
+    snapshot: AssetSnapshot | None = None,
+) -> np.ndarray | None:
+    return (snapshot or get_snapshot()).brand_embed_index.get(brand_name)
+
+def match_brands(
+    desc_embedding: np.ndarray,
+    top_k: int = 5,
+    snapshot: AssetSnapshot | None = None,
+) -> list[dict]:
+    """Known brands whose description is closest to `desc_embedding`, best first."""
+    snapshot = snapshot or get_snapshot()
+    with span("brand_match"):
+        query = np.asarray(desc_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0 or len(snapshot.brand_names) == 0:
+            return []
+        sims = snapshot.brand_desc_embeds @ (query / norm)
+        return [
+            {"brand": str(snapshot.brand_names[i]), "similarity": round(float(sims[i]), 4)}
+            for i in top_k_indices(sims, top_k)
+        ]
 
 def cosine_to_score(sim_raw: float) -> float:
     score_0_10 = (sim_raw + 1.0) / 2.0 * 10.0
     return round(float(score_0_10), 2)
 
-def get_persona_for_artist(artist_name: str) -> str:
-    if "artist" not in df_persona.columns or "persona" not in df_persona.columns:
-        return ""
-    sub = df_persona[df_persona["artist"] == artist_name]
-    if sub.empty:
-        return ""
-    return str(sub["persona"].iloc[0])
-
-def get_past_brands_for_artist(artist_name: str):
-    rows = df_joined[df_joined[CELEB_ID_COL] == artist_name]
-    return rows[BRAND_COL].dropna().unique().tolist()
-
-def get_brand_desc(brand_name: str) -> str:
+def artist_scores_for_queries(
+    query_embeds: np.ndarray,
+    snapshot: AssetSnapshot | None = None,
+    mask: np.ndarray | None = None,
+) -> np.ndarray:
+    """Best cosine per artist for each query row, shape (n_queries, n_artists);
+    -inf where `mask` (per artist, or per query row and artist) is False."""
+    with span("similarity"):
+        return get_search_backend(snapshot).artist_scores(query_embeds, mask)
+
+def artist_result(artist_idx: int, sim_raw: float, snapshot: AssetSnapshot | None = None) -> dict:
+    name = (snapshot or get_snapshot()).artist_names[artist_idx]
+    return {"id": name, "name": name, "score": cosine_to_score(sim_raw)}
+
+def get_persona_for_artist(artist_name: str, snapshot: AssetSnapshot | None = None) -> str:
+    snapshot = snapshot or get_snapshot()
+    profile = get_artist_profile(artist_name, snapshot)
+    if profile is not None:
+        return profile["persona"]
+    return get_persona_by_artist(snapshot).get(artist_name, "")
+
+def get_past_brands_for_artist(artist_name: str, snapshot: AssetSnapshot | None = None):
+    profile = get_artist_profile(artist_name, snapshot)
+    return list(profile["past_brands"]) if profile is not None else []
+
+def get_brand_desc(brand_name: str, snapshot: AssetSnapshot | None = None) -> str:
+    brand_personality = (snapshot or get_snapshot()).brand_personality
     if "brand" not in brand_personality.columns or "desc" not in brand_personality.columns:
         return ""
     row_b = brand_personality[brand_personality["brand"] == brand_name]
@@ -96,54 +128,38 @@ def build_brand_feature_from_embedding(
 
     return feat.reshape(1, -1)
 
-def get_similar_artists(target_artist: str, top_k: int = 5):
-    idxs = np.where(all_celeb_ids == target_artist)[0]
-    if len(idxs) == 0:
+def _similar_artists_live(
+    target_embed: np.ndarray,
+    target_artist: str,
+    top_k: int,
+    snapshot: AssetSnapshot,
+):
+    scores = np.dot(snapshot.artist_mean_embeds, target_embed)
+    idx = snapshot.artist_index.get(target_artist)
+    if idx is not None:
+        scores[idx] = -np.inf
+    return [str(snapshot.artist_names[i]) for i in top_k_indices(scores, top_k)]
+
+def get_similar_artists(
+    target_artist: str,
+    top_k: int = 5,
+    snapshot: AssetSnapshot | None = None,
+):
+    snapshot = snapshot or get_snapshot()
+    profile = get_artist_profile(target_artist, snapshot)
+    if profile is None:
         return []
-
-    target_embed = all_celeb_embeds[idxs].mean(axis=0)
-    target_embed /= np.linalg.norm(target_embed)
-
-    sims = np.dot(all_celeb_embeds, target_embed)
-    sorted_idx = np.argsort(sims)[::-1]
-
-    unique_sim = {}
-    for idx in sorted_idx:
-        cid = all_celeb_ids[idx]
-        if cid == target_artist:
-            continue
-        if cid not in unique_sim:
-            unique_sim[cid] = cosine_to_score(sims[idx])
-        if len(unique_sim) >= top_k:
-            break
-
-    return [
-        name
-        for (name, _) in sorted(
-            unique_sim.items(), key=lambda x: x[1], reverse=True
-        )
-    ]
-
-def guess_score_for_artist_brand(artist_name: str, brand_name: str) -> float:
-    brand_rows = df_joined[df_joined[BRAND_COL] == brand_name]
-    if brand_rows.empty:
+    if top_k <= len(profile["similar"]):
+        return profile["similar"][:top_k]
+    return _similar_artists_live(profile["embed"], target_artist, top_k, snapshot)
+
+def guess_score_for_artist_brand(
+    artist_name: str,
+    brand_name: str,
+    snapshot: AssetSnapshot | None = None,
+) -> float:
+    with span("affinity"):
+        best_sim = artist_brand_affinity(artist_name, brand_name, snapshot)
+    if best_sim is None:
         return 7.5
-
-    idxs = np.where(all_celeb_ids == artist_name)[0]
-    if len(idxs) == 0:
-        return 7.5
-
-    artist_embed = all_celeb_embeds[idxs].mean(axis=0)
-    artist_embed /= np.linalg.norm(artist_embed, axis=0, keepdims=False)
-
-    best_sim = -1.0
-    for _, brow in brand_rows.iterrows():
-        brand_feat = encode_brand_feature_row(brow)
-        brand_embed = brand_encoder.predict(brand_feat, verbose=0)
-        brand_embed /= np.linalg.norm(brand_embed, axis=1, keepdims=True)
-
-        sim = float(np.dot(artist_embed, brand_embed[0]))
-        if sim > best_sim:
-            best_sim = sim
-
     return cosine_to_score(best_sim)
@@ -1,41 +1,236 @@
+import asyncio
+import hashlib
+import os
+from types import SimpleNamespace
 from typing import Any
 
+import httpx
 import numpy as np
 import voyageai
 
-from ..config import VOYAGE_API_KEY, VOYAGE_MODEL
+from ..config import (
+    VOYAGE_API_KEY,
+    VOYAGE_MODEL,
+    EMBED_CACHE_SIZE,
+    EMBED_CACHE_DIR,
+    EMBED_BATCH_MAX_SIZE,
+    EMBED_BATCH_WAIT_MS,
+    VOYAGE_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+)
+from .cache import LRUCache
+from .embedding_batcher import EmbeddingBatcher
+from .metrics import external_call, span
+
+INPUT_TYPE = "document"
+VOYAGE_API_BASE = "https://api.voyageai.com/v1"
+_EMBED_BATCH_SIZE = 128
 
 class VoyageEmbeddingError(Exception):
     """Raised when Voyage AI embedding service fails."""
 
+class AsyncVoyageClient:
+    """Async client for Voyage's embeddings endpoint on a pooled httpx connection."""
+
+    def __init__(self, api_key: str, timeout: float, max_connections: int):
+        self._http = httpx.AsyncClient(
+            base_url=VOYAGE_API_BASE,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def embed(self, texts: list[str], model: str, input_type: str) -> Any:
+        with external_call("voyage"):
+            resp = await self._http.post(
+                "/embeddings",
+                json={"input": texts, "model": model, "input_type": input_type},
+            )
+            resp.raise_for_status()
+        data = sorted(resp.json().get("data", []), key=lambda d: d["index"])
+        return SimpleNamespace(embeddings=[d["embedding"] for d in data])
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
 _voyage_client: voyageai.Client | None = None
+_batcher: EmbeddingBatcher | None = None
+
+_memory_cache = LRUCache(EMBED_CACHE_SIZE)
+_disk_stats = {"hits": 0, "misses": 0, "writes": 0}
 
 def _get_client() -> voyageai.Client:
     global _voyage_client
     if not VOYAGE_API_KEY:
         raise VoyageEmbeddingError("Voyage API key is not configured.")
     if _voyage_client is None:
-        _voyage_client = voyageai.Client(api_key=VOYAGE_API_KEY)
+        _voyage_client = voyageai.Client(api_key=VOYAGE_API_KEY, timeout=VOYAGE_TIMEOUT)
     return _voyage_client
 
+def get_embedding_batcher(client: Any | None = None) -> EmbeddingBatcher:
+    """Shared batcher; pass `client` (e.g. a fake) to replace the Voyage client."""
+    global _batcher
+    if client is not None or _batcher is None:
+        if client is None:
+            if not VOYAGE_API_KEY:
+                raise VoyageEmbeddingError("Voyage API key is not configured.")
+            client = AsyncVoyageClient(VOYAGE_API_KEY, VOYAGE_TIMEOUT, HTTP_MAX_CONNECTIONS)
+        _batcher = EmbeddingBatcher(
+            client,
+            model=VOYAGE_MODEL or "",
+            input_type=INPUT_TYPE,
+            max_batch=EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=EMBED_BATCH_WAIT_MS,
+            error_cls=VoyageEmbeddingError,
+        )
+    return _batcher
+
+async def close_embedding_client() -> None:
+    if _batcher is not None and hasattr(_batcher.client, "aclose"):
+        await _batcher.client.aclose()
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+def embedding_cache_key(text: str, model_name: str, input_type: str = INPUT_TYPE) -> str:
+    raw = "\x00".join([model_name, input_type, normalize_text(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _disk_path(key: str) -> str:
+    return os.path.join(EMBED_CACHE_DIR, key[:2], f"{key}.npy")
+
+def _disk_get(key: str) -> np.ndarray | None:
+    if not EMBED_CACHE_DIR:
+        return None
+    try:
+        vec = np.load(_disk_path(key))
+    except (OSError, ValueError):
+        _disk_stats["misses"] += 1
+        return None
+    _disk_stats["hits"] += 1
+    return vec
+
+def _disk_set(key: str, vec: np.ndarray) -> None:
+    if not EMBED_CACHE_DIR:
+        return
+    path = _disk_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, vec)
+        os.replace(tmp_path, path)
+        _disk_stats["writes"] += 1
+    except OSError:
+        # the disk tier is best effort; the in-process tier still works
+        pass
+
+def get_cached_embedding(key: str) -> np.ndarray | None:
+    vec = _memory_cache.get(key)
+    if vec is not None:
+        return vec
+    vec = _disk_get(key)
+    if vec is not None:
+        _memory_cache.set(key, vec)
+    return vec
+
+def store_embedding(key: str, vec: np.ndarray) -> None:
+    _memory_cache.set(key, vec)
+    _disk_set(key, vec)
+
+def embedding_cache_stats() -> dict:
+    return {"memory": _memory_cache.stats(), "disk": dict(_disk_stats)}
+
+def embedding_batcher_stats() -> dict:
+    return _batcher.stats() if _batcher is not None else {}
+
+def _parse_embeddings(response: Any, expected: int) -> list[np.ndarray]:
+    embeddings: Any = getattr(response, "embeddings", None)
+    if not embeddings or len(embeddings) != expected:
+        raise VoyageEmbeddingError("Voyage API returned no embeddings.")
+    return [np.array(e, dtype=np.float32) for e in embeddings]
+
 def get_voyage_embedding(text: str) -> np.ndarray:
     if not text or not text.strip():
         raise VoyageEmbeddingError("Input text is empty.")
 
-    client = _get_client()
     model_name = VOYAGE_MODEL or ""
-    print(model_name)
+    key = embedding_cache_key(text, model_name)
+    cached = get_cached_embedding(key)
+    if cached is not None:
+        return cached
+
+    client = _get_client()
     try:
-        response = client.embed(
-            text,
-            model=model_name,
-            input_type="document",
-        )
+        with span("embed"), external_call("voyage"):
+            response = client.embed(
+                normalize_text(text),
+                model=model_name,
+                input_type=INPUT_TYPE,
+            )
     except Exception as exc:
         raise VoyageEmbeddingError(f"Voyage embed request failed: {exc}") from exc
 
-    embeddings: Any = getattr(response, "embeddings", None)
-    if not embeddings:
-        raise VoyageEmbeddingError("Voyage API returned no embeddings.")
+    vec = _parse_embeddings(response, 1)[0]
+    store_embedding(key, vec)
+    return vec
+
+async def get_voyage_embedding_async(text: str) -> np.ndarray:
+    """Async variant of get_voyage_embedding that goes through the batcher."""
+    if not text or not text.strip():
+        raise VoyageEmbeddingError("Input text is empty.")
+
+    key = embedding_cache_key(text, VOYAGE_MODEL or "")
+    # only the in-process tier is checked on the loop; disk reads and writes
+    # (np.load / np.save) run on a worker thread
+    cached = _memory_cache.get(key)
+    if cached is None and EMBED_CACHE_DIR:
+        cached = await asyncio.to_thread(_disk_get, key)
+        if cached is not None:
+            _memory_cache.set(key, cached)
+    if cached is not None:
+        return cached
+
+    with span("embed"):
+        vec = await get_embedding_batcher().embed(normalize_text(text))
+    _memory_cache.set(key, vec)
+    if EMBED_CACHE_DIR:
+        await asyncio.to_thread(_disk_set, key, vec)
+    return vec
+
+def prewarm_embedding_cache(path: str) -> int:
+    """Embed every description in `path` (one per line) that is not cached yet.
 
-    return np.array(embeddings[0], dtype=np.float32)
+    Returns the number of descriptions that had to be fetched."""
+    model_name = VOYAGE_MODEL or ""
+    with open(path, encoding="utf-8") as fh:
+        texts = [normalize_text(line) for line in fh if line.strip()]
+
+    missing: dict[str, str] = {}
+    for text in texts:
+        key = embedding_cache_key(text, model_name)
+        if key not in missing and get_cached_embedding(key) is None:
+            missing[key] = text
+
+    pending = list(missing.items())
+    if not pending:
+        return 0
+
+    client = _get_client()
+    for start in range(0, len(pending), _EMBED_BATCH_SIZE):
+        batch = pending[start:start + _EMBED_BATCH_SIZE]
+        try:
+            with external_call("voyage"):
+                response = client.embed(
+                    [text for _, text in batch],
+                    model=model_name,
+                    input_type=INPUT_TYPE,
+                )
+        except Exception as exc:
+            raise VoyageEmbeddingError(f"Voyage embed request failed: {exc}") from exc
+        for (key, _), vec in zip(batch, _parse_embeddings(response, len(batch))):
+            store_embedding(key, vec)
+    return len(pending)
@@ -0,0 +1,105 @@
+import asyncio
+import inspect
+from typing import Any
+
+import numpy as np
+
+class EmbeddingBatcher:
+    """Collects concurrent embed requests into one batched `client.embed` call.
+
+    Callers awaiting `embed()` within `max_wait_ms` of each other (or until
+    `max_batch` texts are queued) share a single upstream request; identical
+    texts that are already in flight share one future. `client` only needs an
+    `embed(texts, model=..., input_type=...)` method returning an object with
+    `.embeddings`, sync or async, so tests can pass a local fake."""
+
+    def __init__(
+        self,
+        client: Any,
+        model: str,
+        input_type: str,
+        max_batch: int = 64,
+        max_wait_ms: float = 5.0,
+        error_cls: type[Exception] = RuntimeError,
+    ):
+        self.client = client
+        self.model = model
+        self.input_type = input_type
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.error_cls = error_cls
+
+        self.batches_sent = 0
+        self.texts_sent = 0
+        self.coalesced = 0
+
+        self._pending: list[str] = []
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        fut = self._inflight.get(text)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._inflight[text] = fut
+        self._pending.append(text)
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await asyncio.shield(fut)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _call_client(self, texts: list[str]) -> Any:
+        if inspect.iscoroutinefunction(self.client.embed):
+            return await self.client.embed(texts, model=self.model, input_type=self.input_type)
+        return await asyncio.to_thread(
+            self.client.embed, texts, model=self.model, input_type=self.input_type
+        )
+
+    async def _send(self, batch: list[str]) -> None:
+        self.batches_sent += 1
+        self.texts_sent += len(batch)
+        try:
+            response = await self._call_client(batch)
+            embeddings = getattr(response, "embeddings", None)
+            if not embeddings or len(embeddings) != len(batch):
+                raise self.error_cls("Voyage API returned no embeddings.")
+        except Exception as exc:
+            if not isinstance(exc, self.error_cls):
+                exc = self.error_cls(f"Voyage embed request failed: {exc}")
+            for text in batch:
+                fut = self._inflight.pop(text, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for text, emb in zip(batch, embeddings):
+            fut = self._inflight.pop(text, None)
+            if fut is not None and not fut.done():
+                fut.set_result(np.array(emb, dtype=np.float32))
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches_sent,
+            "texts": self.texts_sent,
+            "coalesced": self.coalesced,
+        }
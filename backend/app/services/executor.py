@@ -0,0 +1,25 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from ..config import INFERENCE_WORKERS
+
+# dedicated pool for CPU-bound work (model inference, matmuls, pandas lookups)
+# so it neither blocks the event loop nor competes with starlette's threadpool
+_inference_executor = ThreadPoolExecutor(
+    max_workers=max(1, INFERENCE_WORKERS),
+    thread_name_prefix="inference",
+)
+
+async def run_inference(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    # carry the caller's context so request-scoped timing spans see the request
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _inference_executor, functools.partial(ctx.run, fn, *args, **kwargs)
+    )
+
+def shutdown_executor() -> None:
+    _inference_executor.shutdown(wait=False, cancel_futures=True)
@@ -1,39 +1,97 @@
-import os
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
 import openai
+from ..config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    OPENAI_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    PITCH_CACHE_SIZE,
+    PITCH_CACHE_TTL,
+    LLM_MAX_CONCURRENCY,
+    LLM_RPM,
+    LLM_TPM,
+)
 from .context_data import (
+    cosine_to_score,
     get_brand_desc,
     get_persona_for_artist,
-    get_past_brands_for_artist,
-    get_similar_artists,
     guess_score_for_artist_brand,
 )
+from .profiles import get_artist_profile
+from .affinity import brand_affinity_column
+from .concurrency import RateBudget, SingleFlight
+from ..data_loader import AssetSnapshot, get_snapshot
+from .executor import run_inference
+from .cache import LRUCache
+from .metrics import external_call, span
 
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+SYSTEM_PROMPT = (
+    "你是品牌策略顧問，專門幫行銷長準備提案簡報。"
+    "你的重點是『品牌 fit』跟『溝通對象的命中率』"
+)
+LLM_PARAMS = {
+    "model": OPENAI_MODEL,
+    "temperature": 0.7,
+    "max_tokens": 220,
+}
 
-def build_recommendation_pitch(
-    brand: str,
-    artist: str,
-    *,
-    brand_desc_override: str | None = None,
-    match_score_override: float | None = None,
-) -> dict:
-    brand_desc = (
+_openai_client: openai.AsyncOpenAI | None = None
+_pitch_cache = LRUCache(PITCH_CACHE_SIZE, ttl=PITCH_CACHE_TTL)
+_pitch_flight = SingleFlight()
+_pitch_budget = RateBudget(LLM_RPM, LLM_TPM)
+_pitch_semaphore: asyncio.Semaphore | None = None
+_pitch_waiting = 0
+
+def _get_openai_client() -> openai.AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY or None,
+            timeout=OPENAI_TIMEOUT,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                ),
+            ),
+        )
+    return _openai_client
+
+async def close_openai_client() -> None:
+    if _openai_client is not None:
+        await _openai_client.close()
+
+def _artist_context(artist: str, snapshot: AssetSnapshot) -> tuple[str, list[str], list[str]]:
+    profile = get_artist_profile(artist, snapshot)
+    if profile is not None:
+        artist_persona = profile["persona"] or "（暫無藝人描述）"
+        return artist_persona, list(profile["past_brands"]), profile["similar"][:5]
+    artist_persona = get_persona_for_artist(artist, snapshot) or "（暫無藝人描述）"
+    return artist_persona, [], []
+
+def _brand_desc(brand: str, brand_desc_override: str | None, snapshot: AssetSnapshot) -> str:
+    return (
         brand_desc_override.strip()
         if brand_desc_override and brand_desc_override.strip()
-        else get_brand_desc(brand)
+        else get_brand_desc(brand, snapshot)
     ) or "（暫無品牌描述）"
-    artist_persona = get_persona_for_artist(artist) or "（暫無藝人描述）"
-    past_brands = get_past_brands_for_artist(artist) or []
-    similar_list = get_similar_artists(artist, top_k=5) or []
-    match_score = (
-        float(match_score_override)
-        if match_score_override is not None
-        else guess_score_for_artist_brand(artist, brand)
-    )
 
-    user_prompt = f"""
+def _format_pitch_prompt(
+    brand: str,
+    brand_desc: str,
+    artist: str,
+    artist_persona: str,
+    past_brands: list[str],
+    similar_list: list[str],
+    match_score: float,
+) -> str:
+    return f"""
                     [品牌敘述]
                     {brand}：
                     {brand_desc}
@@ -65,39 +123,239 @@ def build_recommendation_pitch(
                     - 不要只說「很紅」，要說品牌語氣/族群 fit。
                 """.strip()
 
-    try:
-        resp = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "你是品牌策略顧問，專門幫行銷長準備提案簡報。"
-                        "你的重點是『品牌 fit』跟『溝通對象的命中率』"
-                    ),
-                },
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7,
-            max_tokens=220,
+def _build_pitch_prompt(
+    brand: str,
+    artist: str,
+    brand_desc_override: str | None,
+    match_score_override: float | None,
+) -> tuple[str, float]:
+    snapshot = get_snapshot()
+    brand_desc = _brand_desc(brand, brand_desc_override, snapshot)
+    match_score = (
+        float(match_score_override)
+        if match_score_override is not None
+        else guess_score_for_artist_brand(artist, brand, snapshot)
+    )
+    user_prompt = _format_pitch_prompt(
+        brand, brand_desc, artist, *_artist_context(artist, snapshot), match_score
+    )
+    return user_prompt, match_score
+
+def _build_pitch_prompts(
+    brand: str,
+    artists: list[str],
+    brand_desc_override: str | None,
+) -> list[tuple[str, float]]:
+    """Prompts for one brand and many artists: the brand description and the
+    brand's affinity column are looked up once for the whole shortlist."""
+    snapshot = get_snapshot()
+    brand_desc = _brand_desc(brand, brand_desc_override, snapshot)
+    with span("affinity"):
+        col = brand_affinity_column(brand, snapshot)
+
+    prompts = []
+    for artist in artists:
+        idx = snapshot.artist_index.get(artist)
+        if col is None or idx is None:
+            match_score = 7.5
+        else:
+            match_score = cosine_to_score(float(col[idx]))
+        user_prompt = _format_pitch_prompt(
+            brand, brand_desc, artist, *_artist_context(artist, snapshot), match_score
         )
+        prompts.append((user_prompt, match_score))
+    return prompts
+
+def _timed_pitch_prompt(*args) -> tuple[str, float]:
+    with span("prompt"):
+        return _build_pitch_prompt(*args)
+
+def _timed_pitch_prompts(*args) -> list[tuple[str, float]]:
+    with span("prompt"):
+        return _build_pitch_prompts(*args)
+
+def _pitch_messages(user_prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+def pitch_cache_key(user_prompt: str) -> str:
+    raw = json.dumps(
+        {"messages": _pitch_messages(user_prompt), **LLM_PARAMS},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def pitch_cache_stats() -> dict:
+    return _pitch_cache.stats()
+
+def pitch_limiter_stats() -> dict:
+    return {
+        **_pitch_budget.stats(),
+        **_pitch_flight.stats(),
+        "waiting": _pitch_waiting,
+    }
 
-        reason = resp.choices[0].message.content.strip()
-        return {
-            "brand": brand,
-            "artist": artist,
-            "recommendation_reason": reason,
-            "score": match_score,
-        }
+def estimate_tokens(user_prompt: str) -> int:
+    """Upper-bound token count of one call: ~1 token per CJK character, plus the reply."""
+    return len(SYSTEM_PROMPT) + len(user_prompt) + LLM_PARAMS["max_tokens"]
+
+@asynccontextmanager
+async def _llm_slot(user_prompt: str):
+    """Concurrency cap plus the RPM/TPM budget, held for one OpenAI call."""
+    global _pitch_semaphore, _pitch_waiting
+    if _pitch_semaphore is None:
+        _pitch_semaphore = asyncio.Semaphore(max(1, LLM_MAX_CONCURRENCY))
+    _pitch_waiting += 1
+    try:
+        await _pitch_semaphore.acquire()
+    finally:
+        _pitch_waiting -= 1
+    try:
+        await _pitch_budget.acquire(estimate_tokens(user_prompt))
+        yield
+    finally:
+        _pitch_semaphore.release()
+
+def _pitch_result(brand: str, artist: str, reason: str, match_score: float) -> dict:
+    return {
+        "brand": brand,
+        "artist": artist,
+        "recommendation_reason": reason,
+        "score": match_score,
+    }
+
+def _fallback_result(brand: str, artist: str, match_score: float, error: Exception) -> dict:
+    fallback = (
+        f"{artist} 的形象與 {brand} 的品牌定位具有高度契合，"
+        f"能強化品牌在目標族群中的吸引力與可信度。"
+    )
+    result = _pitch_result(
+        brand, artist, f"(LLM 生成失敗，使用備用描述) {fallback}", match_score
+    )
+    result["error"] = str(error)
+    return result
+
+async def build_recommendation_pitch(
+    brand: str,
+    artist: str,
+    *,
+    brand_desc_override: str | None = None,
+    match_score_override: float | None = None,
+) -> dict:
+    user_prompt, match_score = await run_inference(
+        _timed_pitch_prompt,
+        brand,
+        artist,
+        brand_desc_override,
+        match_score_override,
+    )
+
+    return await _pitch_for_prompt(brand, artist, user_prompt, match_score)
+
+async def _generate_pitch(cache_key: str, user_prompt: str) -> str:
+    async with _llm_slot(user_prompt):
+        with span("llm"), external_call("openai"):
+            resp = await _get_openai_client().chat.completions.create(
+                messages=_pitch_messages(user_prompt),
+                **LLM_PARAMS,
+            )
+    reason = resp.choices[0].message.content.strip()
+    _pitch_cache.set(cache_key, reason)
+    return reason
+
+async def _pitch_for_prompt(brand: str, artist: str, user_prompt: str, match_score: float) -> dict:
+    cache_key = pitch_cache_key(user_prompt)
+    reason = _pitch_cache.get(cache_key)
+    if reason is not None:
+        return _pitch_result(brand, artist, reason, match_score)
+
+    # identical prompts in flight share one upstream call
+    try:
+        reason = await _pitch_flight.do(cache_key, lambda: _generate_pitch(cache_key, user_prompt))
     except Exception as e:
-        fallback = (
-            f"{artist} 的形象與 {brand} 的品牌定位具有高度契合，"
-            f"能強化品牌在目標族群中的吸引力與可信度。"
-        )
-        return {
-            "brand": brand,
-            "artist": artist,
-            "recommendation_reason": f"(LLM 生成失敗，使用備用描述) {fallback}",
-            "score": match_score,
-            "error": str(e),
-        }
+        return _fallback_result(brand, artist, match_score, e)
+    return _pitch_result(brand, artist, reason, match_score)
+
+async def stream_pitch_batch(
+    brand: str,
+    artists: list[str],
+    *,
+    brand_desc_override: str | None = None,
+) -> AsyncIterator[str]:
+    """Server-sent events: one `pitch` event per artist in completion order
+    (carrying its `index` in `artists`), then a `done` event."""
+    prompts = await run_inference(_timed_pitch_prompts, brand, artists, brand_desc_override)
+
+    async def one(i: int, artist: str, user_prompt: str, match_score: float):
+        return i, await _pitch_for_prompt(brand, artist, user_prompt, match_score)
+
+    tasks = [
+        asyncio.ensure_future(one(i, artist, user_prompt, match_score))
+        for i, (artist, (user_prompt, match_score)) in enumerate(zip(artists, prompts))
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            i, result = await next_done
+            yield _sse("pitch", {"index": i, **result})
+        yield _sse("done", {"count": len(tasks)})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+async def stream_recommendation_pitch(
+    brand: str,
+    artist: str,
+    *,
+    brand_desc_override: str | None = None,
+    match_score_override: float | None = None,
+) -> AsyncIterator[str]:
+    """Server-sent events: `token` events while the pitch is generated, then a
+    `done` event carrying the same dict build_recommendation_pitch returns."""
+    user_prompt, match_score = await run_inference(
+        _timed_pitch_prompt,
+        brand,
+        artist,
+        brand_desc_override,
+        match_score_override,
+    )
+
+    cache_key = pitch_cache_key(user_prompt)
+    reason = _pitch_cache.get(cache_key)
+    if reason is not None:
+        yield _sse("token", {"token": reason})
+        yield _sse("done", _pitch_result(brand, artist, reason, match_score))
+        return
+
+    parts: list[str] = []
+    try:
+        # time to the first streamed chunk; the rest arrives after the headers
+        async with _llm_slot(user_prompt):
+            with span("llm"), external_call("openai"):
+                stream = await _get_openai_client().chat.completions.create(
+                    messages=_pitch_messages(user_prompt),
+                    stream=True,
+                    **LLM_PARAMS,
+                )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    parts.append(token)
+                    yield _sse("token", {"token": token})
+    except Exception as e:
+        result = _fallback_result(brand, artist, match_score, e)
+        if not parts:
+            yield _sse("token", {"token": result["recommendation_reason"]})
+        yield _sse("done", result)
+        return
+
+    reason = "".join(parts).strip()
+    _pitch_cache.set(cache_key, reason)
+    yield _sse("done", _pitch_result(brand, artist, reason, match_score))
@@ -0,0 +1,239 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+from fastapi.routing import APIRoute
+
+from ..config import METRICS_ENABLED
+
+# seconds; Prometheus-style cumulative buckets (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# spans recorded during the current request, as (stage, seconds); None outside a request
+_request_spans: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+
+class Histogram:
+    """Thread-safe Prometheus histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, seconds: float) -> None:
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(BUCKETS) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            total = cumulative + series[len(BUCKETS)]
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {total}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {total}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+stage_seconds = Histogram(
+    "starmatch_stage_seconds", "Time spent in each request stage.", ("stage",)
+)
+request_seconds = Histogram(
+    "starmatch_request_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+external_call_seconds = Histogram(
+    "starmatch_external_call_seconds", "Latency of calls to external APIs.", ("service",)
+)
+external_calls = Counter(
+    "starmatch_external_calls_total", "Calls to external APIs by outcome.", ("service", "outcome")
+)
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.stage, time.perf_counter() - self.start)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(stage: str):
+    """`with span("encoder"):` times a stage into the stage histogram and the
+    current request's Server-Timing header. A shared no-op when disabled."""
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(stage)
+
+def record_span(stage: str, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    stage_seconds.observe((stage,), seconds)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+@contextmanager
+def external_call(service: str):
+    """Time and count one call to an external API; errors are re-raised."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        external_calls.inc((service, "error"))
+        raise
+    finally:
+        external_call_seconds.observe((service,), time.perf_counter() - start)
+    external_calls.inc((service, "ok"))
+
+class TimedRoute(APIRoute):
+    """APIRoute that splits each request into an `endpoint` span (the handler
+    body) and a `serialize` span (request parsing plus response validation
+    and encoding done by FastAPI around it)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if METRICS_ENABLED and inspect.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if not METRICS_ENABLED:
+            return handler
+
+        async def timed_handler(request):
+            spans = _request_spans.get()
+            start = time.perf_counter()
+            response = await handler(request)
+            if spans is not None:
+                endpoint_s = sum(s for stage, s in spans if stage == "endpoint")
+                record_span("serialize", max(0.0, time.perf_counter() - start - endpoint_s))
+            return response
+
+        return timed_handler
+
+def _timed_endpoint(endpoint):
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        with span("endpoint"):
+            return await endpoint(*args, **kwargs)
+    return timed
+
+def server_timing(spans: list[tuple[str, float]], total: float) -> str:
+    durations: dict[str, float] = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{stage};dur={seconds * 1000.0:.2f}" for stage, seconds in durations.items())
+
+class MetricsMiddleware:
+    """ASGI middleware: per-route latency histogram and a Server-Timing header
+    listing the stages recorded before the response started."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: list[tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(spans, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_seconds.observe(
+                (scope["method"], route, str(status)), time.perf_counter() - start
+            )
+
+def render_metrics(extra_lines: list[str] | None = None) -> str:
+    lines = []
+    for metric in (request_seconds, stage_seconds, external_call_seconds, external_calls):
+        lines.extend(metric.render())
+    lines.extend(extra_lines or [])
+    return "\n".join(lines) + "\n"
+
+def gauge_lines(name: str, help_text: str, label_name: str, values: dict[str, float]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for label, value in sorted(values.items()):
+        lines.append(f'{name}{{{label_name}="{_escape(label)}"}} {value:g}')
+    return lines
@@ -0,0 +1,110 @@
+import base64
+import binascii
+import secrets
+import threading
+
+import numpy as np
+
+from ..config import PAGE_CURSOR_CACHE_SIZE, PAGE_CURSOR_TTL
+from ..data_loader import AssetSnapshot
+from .cache import LRUCache
+from .context_data import artist_result
+from .metrics import span
+
+_cursors = LRUCache(PAGE_CURSOR_CACHE_SIZE, ttl=PAGE_CURSOR_TTL)
+
+class CursorError(Exception):
+    """Cursor is malformed or belongs to another query."""
+
+class CursorExpiredError(CursorError):
+    """Cursor was valid, but its scores have been evicted or expired."""
+
+class RankedScores:
+    """Per-artist scores of one query, sorted lazily.
+
+    Only the prefix that has been paged through is ordered; each extension
+    partitions the remaining artists and sorts just the new slice, so deep
+    pages never re-run the encoder or a full sort."""
+
+    def __init__(self, query: tuple, scores: np.ndarray, snapshot: AssetSnapshot):
+        self.query = query
+        self.scores = scores
+        self.snapshot = snapshot
+        self.ranked = np.zeros(0, dtype=np.int64)
+        self.remaining = np.flatnonzero(np.isfinite(scores))
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return len(self.ranked) + len(self.remaining)
+
+    def _extend(self, n: int) -> None:
+        with self._lock:
+            need = min(n, self.total) - len(self.ranked)
+            if need <= 0:
+                return
+            # grow at least geometrically so walking every page stays O(n log n)
+            need = min(max(need, len(self.ranked)), len(self.remaining))
+            rest = self.scores[self.remaining]
+            if need < len(rest):
+                part = np.argpartition(-rest, need - 1)
+                take, keep = part[:need], part[need:]
+            else:
+                take, keep = np.arange(len(rest)), np.zeros(0, dtype=np.int64)
+            take = take[np.argsort(-rest[take], kind="stable")]
+            self.ranked = np.concatenate([self.ranked, self.remaining[take]])
+            self.remaining = self.remaining[keep]
+
+    def page(self, offset: int, limit: int) -> list[dict]:
+        with span("rank"):
+            self._extend(offset + limit)
+            return [
+                artist_result(idx, self.scores[idx], self.snapshot)
+                for idx in self.ranked[offset:offset + limit]
+            ]
+
+def encode_cursor(token: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{token}:{offset}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        token, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise CursorError("cursor 格式錯誤") from exc
+    if not token or offset < 0:
+        raise CursorError("cursor 格式錯誤")
+    return token, offset
+
+def _page_response(token: str, ranked: RankedScores, offset: int, limit: int) -> dict:
+    results = ranked.page(offset, limit)
+    end = offset + len(results)
+    return {
+        "results": results,
+        "total": ranked.total,
+        "nextCursor": encode_cursor(token, end) if end < ranked.total else None,
+    }
+
+def first_page(query: tuple, scores: np.ndarray, snapshot: AssetSnapshot, limit: int) -> dict:
+    """Rank the first `limit` artists and keep the scores for the following pages."""
+    ranked = RankedScores(query, scores, snapshot)
+    token = secrets.token_urlsafe(12)
+    if ranked.total > limit:
+        _cursors.set(token, ranked)
+    return _page_response(token, ranked, 0, limit)
+
+def next_page(query: tuple, cursor: str, limit: int) -> dict:
+    token, offset = decode_cursor(cursor)
+    ranked = _cursors.get(token)
+    if ranked is None:
+        raise CursorExpiredError("cursor 已過期，請重新查詢")
+    if ranked.query != query:
+        raise CursorError("cursor 不屬於這個查詢")
+    return _page_response(token, ranked, offset, limit)
+
+def clear_cursors() -> None:
+    _cursors.clear()
+
+def cursor_cache_stats() -> dict:
+    return _cursors.stats()
@@ -0,0 +1,79 @@
+import numpy as np
+
+from ..artifacts import load_artifacts, save_artifacts
+from ..config import PRECOMPUTED_TOPK
+from ..data_loader import PRECOMPUTED_DIR, AssetSnapshot, get_snapshot
+from .search import search_config_key
+
+# filter combination key: (gender "M" / "F" / "", age bitmask or NO_AGE_FILTER)
+NO_AGE_FILTER = -1
+
+class TopKStore:
+    """Precomputed ranked artists per (filter combination, brand).
+
+    indices: (n_combos, n_brands, top_k) int32 into artist_names, -1 padded.
+    sims: the matching raw cosines (float32), so scores are identical to
+    the live path. Only served while search_config_key() matches the build."""
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.indices = arrays["indices"]
+        self.sims = arrays["sims"]
+        self.top_k = self.indices.shape[2]
+        self.brand_pos = {str(b): i for i, b in enumerate(arrays["brands"])}
+        self.combo_pos = {
+            (str(g), int(a)): i
+            for i, (g, a) in enumerate(zip(arrays["combo_gender"], arrays["combo_age_bits"]))
+        }
+
+    def lookup(self, brand: str, combo: tuple[str, int], top_k: int) -> tuple[np.ndarray, np.ndarray] | None:
+        b = self.brand_pos.get(brand)
+        c = self.combo_pos.get(combo)
+        if b is None or c is None or top_k > self.top_k:
+            return None
+        idx = self.indices[c, b, :top_k]
+        keep = idx >= 0
+        return idx[keep], self.sims[c, b, :top_k][keep]
+
+def _load_store(snapshot: AssetSnapshot) -> TopKStore | None:
+    arrays = load_artifacts(PRECOMPUTED_DIR, snapshot.artifact_version)
+    # built with another backend or other backend parameters: rank live instead
+    if arrays is None or "search" not in arrays or str(arrays["search"][0]) != search_config_key():
+        return None
+    return TopKStore(arrays)
+
+def get_topk_store(snapshot: AssetSnapshot | None = None) -> TopKStore | None:
+    """The store built for `snapshot`'s artifacts, or None when missing or disabled."""
+    if not PRECOMPUTED_TOPK:
+        return None
+    snapshot = snapshot or get_snapshot()
+    return snapshot.memo("topk_store", lambda: _load_store(snapshot))
+
+def save_topk_store(
+    snapshot: AssetSnapshot,
+    combos: list[tuple[str, int]],
+    indices: np.ndarray,
+    sims: np.ndarray,
+) -> str:
+    arrays = {
+        "brands": np.asarray(snapshot.brand_names).astype(str),
+        "combo_gender": np.array([g for g, _ in combos], dtype=str),
+        "combo_age_bits": np.array([a for _, a in combos], dtype=np.int64),
+        "indices": indices.astype(np.int32),
+        "sims": sims.astype(np.float32),
+        "search": np.array([search_config_key()]),
+    }
+    return save_artifacts(
+        PRECOMPUTED_DIR, snapshot.artifact_version, arrays, snapshot.source_hashes
+    )
+
+def topk_store_stats(snapshot: AssetSnapshot | None = None) -> dict:
+    store = get_topk_store(snapshot)
+    if store is None:
+        return {"loaded": 0}
+    return {
+        "loaded": 1,
+        "brands": len(store.brand_pos),
+        "combos": len(store.combo_pos),
+        "top_k": store.top_k,
+        "search": search_config_key(),
+    }
@@ -0,0 +1,37 @@
+from ..data_loader import AssetSnapshot, get_snapshot
+
+def _persona_by_artist(snapshot: AssetSnapshot) -> dict[str, str]:
+    df_persona = snapshot.df_persona
+    if "artist" not in df_persona.columns or "persona" not in df_persona.columns:
+        return {}
+    first = df_persona.drop_duplicates("artist")
+    return dict(zip(first["artist"], first["persona"].astype(str)))
+
+def _past_brands(snapshot: AssetSnapshot, i: int) -> list[str]:
+    starts = snapshot.artist_past_brand_starts
+    return [str(b) for b in snapshot.artist_past_brands[starts[i]:starts[i + 1]]]
+
+def get_persona_by_artist(snapshot: AssetSnapshot | None = None) -> dict[str, str]:
+    snapshot = snapshot or get_snapshot()
+    return snapshot.memo("persona_by_artist", lambda: _persona_by_artist(snapshot))
+
+def build_artist_profiles(snapshot: AssetSnapshot) -> dict[str, dict]:
+    persona_by_artist = get_persona_by_artist(snapshot)
+    names = snapshot.artist_names
+
+    return {
+        str(name): {
+            "persona": persona_by_artist.get(name, ""),
+            "past_brands": _past_brands(snapshot, i),
+            "embed": snapshot.artist_mean_embeds[i],
+            "similar": [str(names[j]) for j in snapshot.artist_knn_indices[i] if j >= 0],
+        }
+        for i, name in enumerate(names)
+    }
+
+def get_artist_profiles(snapshot: AssetSnapshot | None = None) -> dict[str, dict]:
+    snapshot = snapshot or get_snapshot()
+    return snapshot.memo("artist_profiles", lambda: build_artist_profiles(snapshot))
+
+def get_artist_profile(artist_name: str, snapshot: AssetSnapshot | None = None) -> dict | None:
+    return get_artist_profiles(snapshot).get(artist_name)
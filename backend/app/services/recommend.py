@@ -1,13 +1,16 @@
+from ..config import BRAND_MATCH_TOP_K, BRAND_MATCH_MIN_SIMILARITY
 from ..data_loader import (
-    df_joined,
-    all_celeb_ids,
-    all_celeb_embeds,
-    CELEB_ID_COL,
-    BRAND_COL,
+    AssetSnapshot,
+    get_snapshot,
     AGE_BUCKET_COLS,
+    product_cat_cols,
 )
 from .context_data import (
-    encode_brand_feature_row,
+    get_brand_embeds,
+    artist_scores_for_queries,
+    top_k_indices,
+    top_k_indices_batch,
+    artist_result,
     cosine_to_score,
     get_similar_artists,
     get_past_brands_for_artist,
@@ -15,46 +18,131 @@ from .context_data import (
     get_brand_desc,
     guess_score_for_artist_brand,
     build_brand_feature_from_embedding,
+    match_brands,
 )
 from .embedding import get_voyage_embedding
+from .metrics import span
+from .precomputed import NO_AGE_FILTER, get_topk_store
 import numpy as np
 
-def get_artist_gender(artist_name: str) -> float | None:
-    sub = df_joined[df_joined[CELEB_ID_COL] == artist_name]
-    if sub.empty or "gender" not in sub.columns:
+# max query-embedding rows scored per matmul in recommend_artists_batch
+BATCH_CHUNK_ROWS = 256
+
+def _age_query_bits(min_age: int | None, max_age: int | None) -> int:
+    """Bitmask of AGE_BUCKET_COLS that lie fully inside [min_age, max_age]."""
+    q_min = min_age if min_age is not None else -10**9
+    q_max = max_age if max_age is not None else 10**9
+
+    bits = 0
+    for bit, col in enumerate(AGE_BUCKET_COLS):
+        try:
+            lo_s, hi_s = col.split("-")
+            lo_v = int(lo_s)
+            hi_v = int(hi_s)
+        except ValueError:
+            continue
+        if lo_v >= q_min and hi_v <= q_max:
+            bits |= 1 << bit
+    return bits
+
+def _product_query_bits(product_cats: list[str] | None) -> int:
+    cat_set = {c.strip() for c in product_cats or [] if c.strip()}
+    bits = 0
+    for bit, cat in enumerate(product_cat_cols):
+        if cat in cat_set:
+            bits |= 1 << bit
+    return bits
+
+def get_artist_gender(artist_name: str, snapshot: AssetSnapshot | None = None) -> float | None:
+    snapshot = snapshot or get_snapshot()
+    idx = snapshot.artist_index.get(artist_name)
+    if idx is None or np.isnan(snapshot.artist_gender[idx]):
         return None
-    g_mean = float(sub["gender"].mean())
-    return 1.0 if g_mean >= 0.5 else 0.0
+    return float(snapshot.artist_gender[idx])
 
 def artist_is_within_age_range_strict(
     artist_name: str,
     min_age: int | None,
     max_age: int | None,
+    snapshot: AssetSnapshot | None = None,
 ) -> bool:
     if min_age is None and max_age is None:
         return True
 
-    sub = df_joined[df_joined[CELEB_ID_COL] == artist_name]
-    if sub.empty:
+    snapshot = snapshot or get_snapshot()
+    idx = snapshot.artist_index.get(artist_name)
+    if idx is None:
         return False
+    return bool(int(snapshot.artist_age_bits[idx]) & _age_query_bits(min_age, max_age))
 
-    q_min = min_age if min_age is not None else -10**9
-    q_max = max_age if max_age is not None else 10**9
+def artist_filter_mask(
+    artist_gender_filter: str | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+    product_cats: list[str] | None = None,
+    snapshot: AssetSnapshot | None = None,
+) -> np.ndarray | None:
+    """Boolean mask over artist_names, or None when no filter is set."""
+    snapshot = snapshot or get_snapshot()
+    mask = None
 
-    for col in AGE_BUCKET_COLS:
-        if col not in sub.columns:
-            continue
-        if sub[col].fillna(0).astype(float).max() >= 1.0:
-            try:
-                lo_s, hi_s = col.split("-")
-                lo_v = int(lo_s)
-                hi_v = int(hi_s)
-            except:
-                continue
-            fully_inside = (lo_v >= q_min) and (hi_v <= q_max)
-            if fully_inside:
-                return True
-    return False
+    if artist_gender_filter in ["M", "F"]:
+        want = 1.0 if artist_gender_filter == "M" else 0.0
+        mask = snapshot.artist_gender == want
+
+    if min_age is not None or max_age is not None:
+        age_mask = (snapshot.artist_age_bits & _age_query_bits(min_age, max_age)) != 0
+        mask = age_mask if mask is None else mask & age_mask
+
+    product_bits = _product_query_bits(product_cats)
+    if product_bits:
+        product_mask = (snapshot.artist_product_bits & product_bits) != 0
+        mask = product_mask if mask is None else mask & product_mask
+
+    return mask
+
+def filter_combo(
+    artist_gender_filter: str | None,
+    min_age: int | None,
+    max_age: int | None,
+) -> tuple[str, int]:
+    """Key of a gender/age filter in the precomputed store; ages that select
+    the same buckets share a key."""
+    gender = artist_gender_filter if artist_gender_filter in ["M", "F"] else ""
+    if min_age is None and max_age is None:
+        return gender, NO_AGE_FILTER
+    return gender, _age_query_bits(min_age, max_age)
+
+def _precomputed_results(
+    brand_name: str,
+    top_k: int,
+    artist_gender_filter: str | None,
+    min_age: int | None,
+    max_age: int | None,
+    product_cats: list[str] | None,
+    snapshot: AssetSnapshot,
+) -> list[dict] | None:
+    store = get_topk_store(snapshot)
+    if store is None or _product_query_bits(product_cats):
+        return None
+    hit = store.lookup(brand_name, filter_combo(artist_gender_filter, min_age, max_age), top_k)
+    if hit is None:
+        return None
+    return [artist_result(idx, sim, snapshot) for idx, sim in zip(*hit)]
+
+def _rank_artists(scores: np.ndarray, top_k: int, snapshot: AssetSnapshot) -> list[dict]:
+    with span("rank"):
+        return [
+            artist_result(idx, scores[idx], snapshot)
+            for idx in top_k_indices(scores, top_k)
+        ]
+
+def _encode_brand_features(brand_feats: np.ndarray, snapshot: AssetSnapshot) -> np.ndarray:
+    with span("encoder"):
+        brand_embed = snapshot.brand_encoder.predict(brand_feats, verbose=0)
+    norm = np.linalg.norm(brand_embed, axis=1, keepdims=True)
+    norm[norm == 0] = 1.0
+    return brand_embed / norm
 
 def recommend_artists_for_brand(
     brand_name: str,
@@ -62,64 +150,132 @@ def recommend_artists_for_brand(
     artist_gender_filter: str | None = None,
     min_age: int | None = None,
     max_age: int | None = None,
+    product_cats: list[str] | None = None,
+    snapshot: AssetSnapshot | None = None,
 ):
-    brand_rows = df_joined[df_joined[BRAND_COL] == brand_name]
-    if brand_rows.empty:
+    snapshot = snapshot or get_snapshot()
+    with span("precomputed"):
+        results = _precomputed_results(
+            brand_name, top_k, artist_gender_filter, min_age, max_age, product_cats, snapshot
+        )
+    if results is not None:
+        return results
+
+    scores = brand_score_vector(
+        brand_name, artist_gender_filter, min_age, max_age, product_cats, snapshot
+    )
+    if scores is None:
         return []
+    return _rank_artists(scores, top_k, snapshot)
 
-    CANDIDATES_PER_ROW = 100
-    gathered = []
-
-    for _, brow in brand_rows.iterrows():
-        brand_feat = encode_brand_feature_row(brow)
-        from ..data_loader import brand_encoder
-        brand_embed = brand_encoder.predict(brand_feat, verbose=0)
-        brand_embed /= np.linalg.norm(brand_embed, axis=1, keepdims=True)
-
-        sims = np.dot(all_celeb_embeds, brand_embed[0])
-        sorted_idx = np.argsort(sims)[::-1]
-
-        seen_this_round = set()
-        for idx in sorted_idx:
-            artist_name = all_celeb_ids[idx]
-            if artist_name in seen_this_round:
-                continue
-            seen_this_round.add(artist_name)
-
-            gathered.append({
-                "id": artist_name,
-                "name": artist_name,
-                "score": cosine_to_score(sims[idx]),
-            })
-
-            if len(seen_this_round) >= CANDIDATES_PER_ROW:
-                break
-
-    best_by_artist: dict[str, dict] = {}
-    for row in gathered:
-        nm = row["name"]
-        if nm not in best_by_artist or row["score"] > best_by_artist[nm]["score"]:
-            best_by_artist[nm] = row
-
-    filtered = []
-    for artist_name, data in best_by_artist.items():
-        if artist_gender_filter in ["M", "F"]:
-            g_val = get_artist_gender(artist_name)
-            if g_val is None:
-                continue
-            want_male = (artist_gender_filter == "M")
-            if want_male and g_val != 1.0:
-                continue
-            if (not want_male) and g_val != 0.0:
-                continue
-
-        if not artist_is_within_age_range_strict(artist_name, min_age, max_age):
-            continue
+def brand_score_vector(
+    brand_name: str,
+    artist_gender_filter: str | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+    product_cats: list[str] | None = None,
+    snapshot: AssetSnapshot | None = None,
+) -> np.ndarray | None:
+    """Best cosine per artist for a known brand, -inf where filtered out.
+    None when the brand is unknown."""
+    snapshot = snapshot or get_snapshot()
+    brand_embeds = get_brand_embeds(brand_name, snapshot)
+    if brand_embeds is None:
+        return None
+
+    # one matmul over every brand row, then the best row per artist
+    with span("filter"):
+        mask = artist_filter_mask(artist_gender_filter, min_age, max_age, product_cats, snapshot)
+    return artist_scores_for_queries(brand_embeds, snapshot, mask).max(axis=0)
+
+def description_score_vector(
+    desc_embedding: np.ndarray,
+    artist_gender_filter: str | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+    product_cats: list[str] | None = None,
+    snapshot: AssetSnapshot | None = None,
+) -> np.ndarray:
+    """Best cosine per artist for a description embedding, -inf where filtered out."""
+    snapshot = snapshot or get_snapshot()
+    with span("features"):
+        brand_feat = build_brand_feature_from_embedding(
+            desc_embedding,
+            target_gender=artist_gender_filter,
+            min_age=min_age,
+            max_age=max_age,
+            product_cats=product_cats,
+        )
+
+    brand_embed = _encode_brand_features(brand_feat, snapshot)
+
+    with span("filter"):
+        mask = artist_filter_mask(artist_gender_filter, min_age, max_age, snapshot=snapshot)
+    return artist_scores_for_queries(brand_embed, snapshot, mask)[0]
+
+def recommend_artists_by_embedding(
+    desc_embedding: np.ndarray,
+    top_k: int = 10,
+    artist_gender_filter: str | None = None,
+    min_age: int | None = None,
+    max_age: int | None = None,
+    product_cats: list[str] | None = None,
+    snapshot: AssetSnapshot | None = None,
+):
+    snapshot = snapshot or get_snapshot()
+    scores = description_score_vector(
+        desc_embedding, artist_gender_filter, min_age, max_age, product_cats, snapshot
+    )
+    results = _rank_artists(scores, top_k, snapshot)
+
+    # nearest known brands; primaryBrand only when the description is clearly one of them
+    matches = match_brands(desc_embedding, BRAND_MATCH_TOP_K, snapshot)
+    primary_brand = None
+    if matches and matches[0]["similarity"] >= BRAND_MATCH_MIN_SIMILARITY:
+        primary_brand = matches[0]["brand"]
+    return primary_brand, matches, results
+
+def precompute_brand_top_k(
+    filters: list[tuple[str | None, int | None, int | None]],
+    top_k: int = 50,
+    chunk_brands: int = 256,
+    snapshot: AssetSnapshot | None = None,
+) -> tuple[list[tuple[str, int]], np.ndarray, np.ndarray]:
+    """Ranked artists for every known brand under each (gender, min_age,
+    max_age) filter, scored like recommend_artists_for_brand.
+
+    Returns the filter keys and (n_filters, n_brands, top_k) artist indices
+    (-1 padded) and raw cosines, in snapshot.brand_names order."""
+    snapshot = snapshot or get_snapshot()
+    combos, masks = [], []
+    for gender, min_age, max_age in filters:
+        combo = filter_combo(gender, min_age, max_age)
+        if combo not in combos:
+            combos.append(combo)
+            masks.append(artist_filter_mask(gender, min_age, max_age, snapshot=snapshot))
 
-        filtered.append(data)
+    n_brands = len(snapshot.brand_names)
+    top_k = min(top_k, len(snapshot.artist_names))
+    indices = np.full((len(combos), n_brands, top_k), -1, dtype=np.int32)
+    sims = np.zeros((len(combos), n_brands, top_k), dtype=np.float32)
 
-    filtered.sort(key=lambda x: x["score"], reverse=True)
-    return filtered[:top_k]
+    # brands are contiguous in the brand index: score a block of them per matmul.
+    # The mask goes into the search backend (as in brand_score_vector), since
+    # a re-ranking backend picks its candidates among the allowed artists.
+    bounds = np.r_[snapshot.derived_arrays["brand_index_starts"], len(snapshot.all_brand_embeds)]
+    for b0 in range(0, n_brands, chunk_brands):
+        b1 = min(b0 + chunk_brands, n_brands)
+        rows = snapshot.all_brand_embeds[bounds[b0]:bounds[b1]]
+        for c, mask in enumerate(masks):
+            masked = np.maximum.reduceat(
+                artist_scores_for_queries(rows, snapshot, mask), bounds[b0:b1] - bounds[b0], axis=0
+            )
+            top = top_k_indices_batch(masked, top_k)
+            top_sims = np.take_along_axis(masked, top, axis=1)
+            valid = np.isfinite(top_sims)
+            indices[c, b0:b1] = np.where(valid, top, -1)
+            sims[c, b0:b1] = np.where(valid, top_sims, 0.0)
+    return combos, indices, sims
 
 def recommend_artists_by_description(
     description: str,
@@ -133,61 +289,96 @@ def recommend_artists_by_description(
         return None, [], []
 
     desc_embedding = get_voyage_embedding(description)
-    
-    brand_feat = build_brand_feature_from_embedding(
+    return recommend_artists_by_embedding(
         desc_embedding,
-        target_gender=artist_gender_filter,
+        top_k=top_k,
+        artist_gender_filter=artist_gender_filter,
         min_age=min_age,
         max_age=max_age,
         product_cats=product_cats,
     )
 
-    from ..data_loader import brand_encoder
+def recommend_artists_batch(
+    queries: list[dict],
+    snapshot: AssetSnapshot | None = None,
+) -> list[list[dict]]:
+    """Rank artists for many queries at once.
 
-    brand_embed = brand_encoder.predict(brand_feat, verbose=0)
-    norm = np.linalg.norm(brand_embed, axis=1, keepdims=True)
-    norm[norm == 0] = 1.0
-    brand_embed /= norm
-
-    sims = np.dot(all_celeb_embeds, brand_embed[0])
-    sorted_idx = np.argsort(sims)[::-1]
-
-    best_by_artist: dict[str, dict] = {}
-    for idx in sorted_idx:
-        artist_name = all_celeb_ids[idx]
-
-        if artist_gender_filter in ["M", "F"]:
-            g_val = get_artist_gender(artist_name)
-            if g_val is None:
-                continue
-            want_male = (artist_gender_filter == "M")
-            if want_male and g_val != 1.0:
-                continue
-            if (not want_male) and g_val != 0.0:
-                continue
-
-        if not artist_is_within_age_range_strict(artist_name, min_age, max_age):
+    Each query is a dict with either a non-empty `brand_name` or
+    `desc_embedding` (an empty brand counts as missing), plus
+    the keyword arguments of recommend_artists_for_brand /
+    recommend_artists_by_embedding (top_k, artist_gender_filter, min_age,
+    max_age, product_cats). Results come back in query order."""
+    snapshot = snapshot or get_snapshot()
+    # one block of query embeddings per query: the brand's index rows, or the
+    # encoded description feature (all descriptions share one encoder pass)
+    blocks: list[np.ndarray | None] = [None] * len(queries)
+    desc_slots, desc_feats = [], []
+    for i, q in enumerate(queries):
+        if q.get("brand_name"):
+            blocks[i] = get_brand_embeds(q["brand_name"], snapshot)
+        elif q.get("desc_embedding") is not None:
+            desc_slots.append(i)
+            desc_feats.append(build_brand_feature_from_embedding(
+                q["desc_embedding"],
+                target_gender=q.get("artist_gender_filter"),
+                min_age=q.get("min_age"),
+                max_age=q.get("max_age"),
+                product_cats=q.get("product_cats"),
+            ))
+    if desc_feats:
+        desc_embeds = _encode_brand_features(np.concatenate(desc_feats), snapshot)
+        for slot, i in enumerate(desc_slots):
+            blocks[i] = desc_embeds[slot:slot + 1]
+
+    results: list[list[dict]] = [[] for _ in queries]
+    active = [i for i, block in enumerate(blocks) if block is not None and len(block) > 0]
+
+    # score in chunks of queries so the (rows x artists) matrix stays bounded
+    chunk: list[int] = []
+    chunk_rows = 0
+    for pos, i in enumerate(active):
+        chunk.append(i)
+        chunk_rows += len(blocks[i])
+        if chunk_rows < BATCH_CHUNK_ROWS and pos < len(active) - 1:
             continue
 
-        score_val = cosine_to_score(sims[idx])
-        existing = best_by_artist.get(artist_name)
-        if existing is None or score_val > existing["score"]:
-            best_by_artist[artist_name] = {
-                "id": artist_name,
-                "name": artist_name,
-                "score": score_val,
-            }
-
-        if len(best_by_artist) >= top_k and existing is None:
-            # we have collected enough unique artists; can stop early
-            break
-
-    results = sorted(
-        best_by_artist.values(),
-        key=lambda x: x["score"],
-        reverse=True,
-    )
-    return None, [], results[:top_k]
+        block_starts = np.cumsum([0] + [len(blocks[j]) for j in chunk[:-1]])
+        masks = []
+        for j in chunk:
+            q = queries[j]
+            is_brand = bool(q.get("brand_name"))
+            masks.append(artist_filter_mask(
+                q.get("artist_gender_filter"),
+                q.get("min_age"),
+                q.get("max_age"),
+                q.get("product_cats") if is_brand else None,
+                snapshot,
+            ))
+        # one mask row per query row, so the backend filters before any re-ranking
+        row_mask = None
+        if any(m is not None for m in masks):
+            row_mask = np.concatenate([
+                np.broadcast_to(True if m is None else m, (len(blocks[j]), len(snapshot.artist_names)))
+                for j, m in zip(chunk, masks)
+            ])
+        row_scores = artist_scores_for_queries(
+            np.concatenate([blocks[j] for j in chunk]), snapshot, row_mask
+        )
+        scores = np.maximum.reduceat(row_scores, block_starts, axis=0)
+
+        top_ks = [queries[j].get("top_k", 10) for j in chunk]
+        top_idx = top_k_indices_batch(scores, max(top_ks))
+        for row, j in enumerate(chunk):
+            results[j] = [
+                artist_result(idx, scores[row, idx], snapshot)
+                for idx in top_idx[row, :top_ks[row]]
+                if np.isfinite(scores[row, idx])
+            ]
+
+        chunk, chunk_rows = [], 0
+
+    return results
 
 __all__ = [
     "recommend_artists_for_brand",
@@ -197,4 +388,9 @@ __all__ = [
     "get_brand_desc",
     "guess_score_for_artist_brand",
     "recommend_artists_by_description",
+    "recommend_artists_by_embedding",
+    "recommend_artists_batch",
+    "brand_score_vector",
+    "description_score_vector",
+    "precompute_brand_top_k",
 ]
@@ -0,0 +1,116 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode
+
+from ..config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_MAX_AGE
+from ..data_loader import current_snapshot
+from .cache import LRUCache
+
+# GET /recommendations/{brand} and /candidate/{artist}: deterministic per asset version
+CACHEABLE_PREFIXES = ("/recommendations/", "/candidate/")
+_MAX_BODY_BYTES = 256 * 1024
+
+_response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+
+def clear_response_cache() -> None:
+    _response_cache.clear()
+
+def response_cache_stats() -> dict:
+    return _response_cache.stats()
+
+def _is_cacheable(scope) -> bool:
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return False
+    path = scope["path"]
+    for prefix in CACHEABLE_PREFIXES:
+        if path.startswith(prefix):
+            rest = path[len(prefix):]
+            return bool(rest) and "/" not in rest
+    return False
+
+def normalize_query(query_string: bytes) -> str:
+    """Sorted query string, so ?b=1&a=2 and ?a=2&b=1 share an entry."""
+    pairs = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode(sorted(pairs))
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+class ResponseCacheMiddleware:
+    """In-process LRU of GET responses keyed by (asset version, path, query).
+
+    Every cacheable 200 response carries an ETag (hash of the body) and
+    Cache-Control, and a matching If-None-Match gets an empty 304. The asset
+    version in the key means a reload never serves stale entries."""
+
+    def __init__(self, app, max_age: int = RESPONSE_CACHE_MAX_AGE):
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}".encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        # no snapshot yet: never trigger the load from the event loop
+        snapshot = current_snapshot()
+        if _response_cache.maxsize <= 0 or snapshot is None or not _is_cacheable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        key = (snapshot.version, scope["path"], normalize_query(scope["query_string"]))
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        entry = _response_cache.get(key)
+        if entry is not None:
+            status, headers, body, etag = entry
+            await self._send(send, status, headers, body, etag, if_none_match, b"HIT")
+            return
+
+        start: dict = {}
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        body = b"".join(chunks)
+        status = start.get("status", 500)
+        headers = [
+            (k, v) for k, v in start.get("headers", [])
+            if k.lower() not in (b"etag", b"cache-control")
+        ]
+        if status != 200:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = _etag(body)
+        if len(body) <= _MAX_BODY_BYTES:
+            _response_cache.set(key, (status, headers, body, etag))
+        await self._send(send, status, headers, body, etag, if_none_match, b"MISS")
+
+    async def _send(self, send, status, headers, body, etag, if_none_match, cache_state):
+        extra = [
+            (b"etag", etag.encode("latin-1")),
+            (b"cache-control", self.cache_control),
+            (b"x-cache", cache_state),
+        ]
+        if _etag_matches(if_none_match, etag):
+            kept = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"content-type")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept + extra})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": status, "headers": headers + extra})
+        await send({"type": "http.response.body", "body": body})
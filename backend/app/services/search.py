@@ -0,0 +1,284 @@
+import numpy as np
+
+from ..config import (
+    SEARCH_BACKEND,
+    IVF_N_LISTS,
+    IVF_N_PROBE,
+    SEARCH_QUANT_DTYPE,
+    SEARCH_RERANK_K,
+)
+from ..data_loader import AssetSnapshot, get_snapshot
+
+_CHUNK_ROWS = 8192
+
+def _row_artists(row_starts: np.ndarray, n_rows: int) -> np.ndarray:
+    counts = np.diff(np.r_[row_starts, n_rows])
+    return np.repeat(np.arange(len(row_starts)), counts)
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k finite scores, best first (artists, brands, ...)."""
+    valid = np.flatnonzero(np.isfinite(scores))
+    k = min(top_k, len(valid))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(valid):
+        part = np.argpartition(-scores[valid], k - 1)[:k]
+        valid = valid[part]
+    return valid[np.argsort(-scores[valid], kind="stable")]
+
+def top_k_indices_batch(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Row-wise top_k of a (n_queries, n_artists) score matrix, best first."""
+    n_queries, n_artists = scores.shape
+    k = min(top_k, n_artists)
+    if k <= 0:
+        return np.zeros((n_queries, 0), dtype=np.int64)
+    if k < n_artists:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n_artists), (n_queries, n_artists))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+def _apply_mask(scores: np.ndarray, mask: np.ndarray | None) -> np.ndarray:
+    return scores if mask is None else np.where(mask, scores, -np.inf).astype(np.float32)
+
+class ExactSearch:
+    """Brute-force cosine over every celebrity row."""
+
+    name = "exact"
+
+    def __init__(self, embeds: np.ndarray, row_starts: np.ndarray):
+        self.embeds = embeds
+        self.row_starts = row_starts
+
+    def artist_scores(self, queries: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+        """Best cosine per artist for each query row, shape (n_queries, n_artists).
+
+        `mask` (n_artists,) or (n_queries, n_artists): False entries get -inf."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if len(self.row_starts) == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+        sims = np.dot(queries, self.embeds.T)
+        return _apply_mask(np.maximum.reduceat(sims, self.row_starts, axis=1), mask)
+
+class IVFSearch:
+    """Inverted-file index: rows are bucketed by spherical k-means and only
+    the n_probe closest buckets are scanned per query. Artists with no row in
+    the probed buckets get -inf."""
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        embeds: np.ndarray,
+        row_starts: np.ndarray,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        n_iter: int = 10,
+        seed: int = 0,
+    ):
+        self.embeds = embeds
+        self.row_starts = row_starts
+        self.row_artist = _row_artists(row_starts, len(embeds))
+
+        n_rows = len(embeds)
+        if n_lists <= 0:
+            n_lists = int(np.sqrt(n_rows)) or 1
+        self.n_lists = max(1, min(n_lists, n_rows))
+        if n_probe < 1:
+            raise ValueError(f"n_probe must be >= 1, got {n_probe}")
+        self.n_probe = n_probe
+
+        self.centroids, assign = self._train(n_iter, seed)
+        order = np.argsort(assign, kind="stable")
+        self.list_rows = order.astype(np.int64)
+        self.list_offsets = np.searchsorted(
+            assign[order], np.arange(self.n_lists + 1)
+        )
+
+    def _assign(self, centroids: np.ndarray) -> np.ndarray:
+        assign = np.empty(len(self.embeds), dtype=np.int64)
+        for start in range(0, len(self.embeds), _CHUNK_ROWS):
+            chunk = self.embeds[start:start + _CHUNK_ROWS]
+            assign[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assign
+
+    def _train(self, n_iter: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+        dim = self.embeds.shape[1] if self.embeds.ndim == 2 else 0
+        if len(self.embeds) == 0:
+            return np.zeros((self.n_lists, dim), dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        rng = np.random.default_rng(seed)
+        centroids = self.embeds[
+            rng.choice(len(self.embeds), self.n_lists, replace=False)
+        ].astype(np.float32)
+        assign = self._assign(centroids)
+
+        for _ in range(n_iter):
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.embeds)
+            counts = np.bincount(assign, minlength=self.n_lists)
+
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = self.embeds[rng.choice(len(self.embeds), int(empty.sum()))]
+
+            norm = np.linalg.norm(sums, axis=1, keepdims=True)
+            norm[norm == 0] = 1.0
+            centroids = (sums / norm).astype(np.float32)
+
+            new_assign = self._assign(centroids)
+            if np.array_equal(new_assign, assign):
+                break
+            assign = new_assign
+
+        return centroids, assign
+
+    def artist_scores(
+        self,
+        queries: np.ndarray,
+        mask: np.ndarray | None = None,
+        n_probe: int | None = None,
+    ) -> np.ndarray:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        out = np.full((queries.shape[0], len(self.row_starts)), -np.inf, dtype=np.float32)
+        if len(self.row_starts) == 0:
+            return out
+
+        n_probe = self.n_probe if n_probe is None else n_probe
+        if n_probe < 1:
+            raise ValueError(f"n_probe must be >= 1, got {n_probe}")
+        n_probe = min(n_probe, self.n_lists)
+        centroid_sims = queries @ self.centroids.T
+        if n_probe < self.n_lists:
+            probed = np.argpartition(-centroid_sims, n_probe - 1, axis=1)[:, :n_probe]
+        else:
+            probed = np.broadcast_to(np.arange(self.n_lists), (queries.shape[0], self.n_lists))
+
+        for qi, lists in enumerate(probed):
+            rows = np.concatenate([
+                self.list_rows[self.list_offsets[l]:self.list_offsets[l + 1]]
+                for l in lists
+            ])
+            if len(rows) == 0:
+                continue
+            sims = self.embeds[rows] @ queries[qi]
+            np.maximum.at(out[qi], self.row_artist[rows], sims)
+        return _apply_mask(out, mask)
+
+class QuantizedSearch:
+    """Compact first pass plus exact re-ranking.
+
+    The scan runs over an int8 (per-row scale) or float16 copy of the
+    embeddings, a quarter or half of the float32 size; only the best
+    `rerank_k` artists per query are re-scored against the float32 rows,
+    which stay memory-mapped and are paged in for those rows alone.
+    Artists outside the re-ranked set keep their approximate score."""
+
+    name = "quantized"
+
+    def __init__(
+        self,
+        embeds: np.ndarray,
+        row_starts: np.ndarray,
+        dtype: str = "int8",
+        rerank_k: int = 256,
+    ):
+        self.embeds = embeds
+        self.row_starts = row_starts
+        self.row_ends = np.r_[row_starts[1:], len(embeds)].astype(np.int64)
+        self.dtype = dtype
+        self.rerank_k = rerank_k
+
+        if dtype == "int8":
+            self.codes = np.empty(embeds.shape, dtype=np.int8)
+            self.scales = np.empty(len(embeds), dtype=np.float32)
+            for start in range(0, len(embeds), _CHUNK_ROWS):
+                chunk = np.asarray(embeds[start:start + _CHUNK_ROWS], dtype=np.float32)
+                scale = np.abs(chunk).max(axis=1) / 127.0
+                scale[scale == 0] = 1.0
+                self.codes[start:start + len(chunk)] = np.round(chunk / scale[:, None])
+                self.scales[start:start + len(chunk)] = scale
+        elif dtype == "float16":
+            self.codes = np.asarray(embeds, dtype=np.float16)
+            self.scales = None
+        else:
+            raise ValueError(f"Unknown quantization dtype: {dtype}")
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size of the first-pass index."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _approx_row_scores(self, queries: np.ndarray) -> np.ndarray:
+        sims = np.empty((queries.shape[0], len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), _CHUNK_ROWS):
+            chunk = self.codes[start:start + _CHUNK_ROWS].astype(np.float32)
+            sims[:, start:start + len(chunk)] = queries @ chunk.T
+        if self.scales is not None:
+            sims *= self.scales
+        return sims
+
+    def _rerank(self, query: np.ndarray, artists: np.ndarray) -> np.ndarray:
+        counts = self.row_ends[artists] - self.row_starts[artists]
+        offsets = np.r_[0, np.cumsum(counts)[:-1]]
+        rows = np.repeat(self.row_starts[artists] - offsets, counts) + np.arange(counts.sum())
+        sims = np.asarray(self.embeds[rows], dtype=np.float32) @ query
+        return np.maximum.reduceat(sims, offsets)
+
+    def artist_scores(
+        self,
+        queries: np.ndarray,
+        mask: np.ndarray | None = None,
+        rerank_k: int | None = None,
+    ) -> np.ndarray:
+        """Like ExactSearch.artist_scores; the mask is applied before choosing
+        the artists to re-rank, so filtered queries re-rank their best allowed
+        artists rather than the unfiltered top."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if len(self.row_starts) == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+        out = np.maximum.reduceat(self._approx_row_scores(queries), self.row_starts, axis=1)
+        out = _apply_mask(out, mask)
+
+        rerank_k = self.rerank_k if rerank_k is None else rerank_k
+        if rerank_k > 0:
+            for qi, top in enumerate(top_k_indices_batch(out, rerank_k)):
+                top = top[np.isfinite(out[qi, top])]
+                if len(top):
+                    out[qi, top] = self._rerank(queries[qi], top)
+        return out
+
+def make_search_backend(kind: str, snapshot: AssetSnapshot | None = None, **params):
+    snapshot = snapshot or get_snapshot()
+    if kind == "exact":
+        return ExactSearch(snapshot.all_celeb_embeds, snapshot.artist_row_starts)
+    if kind == "ivf":
+        return IVFSearch(snapshot.all_celeb_embeds, snapshot.artist_row_starts, **params)
+    if kind == "quantized":
+        return QuantizedSearch(snapshot.all_celeb_embeds, snapshot.artist_row_starts, **params)
+    raise ValueError(f"Unknown search backend: {kind}")
+
+def search_backend_params() -> dict:
+    """Constructor parameters of the configured SEARCH_BACKEND."""
+    if SEARCH_BACKEND == "ivf":
+        return {"n_lists": IVF_N_LISTS, "n_probe": IVF_N_PROBE}
+    if SEARCH_BACKEND == "quantized":
+        return {"dtype": SEARCH_QUANT_DTYPE, "rerank_k": SEARCH_RERANK_K}
+    return {}
+
+def search_config_key() -> str:
+    """The configured backend and its parameters, e.g. "ivf n_lists=0 n_probe=8".
+
+    Results computed under one key are only reused under the same key."""
+    params = search_backend_params()
+    return " ".join([SEARCH_BACKEND] + [f"{k}={params[k]}" for k in sorted(params)])
+
+def get_search_backend(snapshot: AssetSnapshot | None = None):
+    """The configured backend over `snapshot` (default: current), built once per snapshot."""
+    snapshot = snapshot or get_snapshot()
+
+    def build():
+        return make_search_backend(SEARCH_BACKEND, snapshot, **search_backend_params())
+
+    return snapshot.memo("search_backend", build)
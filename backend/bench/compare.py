@@ -0,0 +1,19 @@
+"""Compare two bench.run reports.
+
+Usage (from backend/):
+    python -m bench.compare bench/results/base.json bench/results/new.json
+"""
+import argparse
+
+from bench.report import compare_reports, load_report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args()
+    for line in compare_reports(load_report(args.base), load_report(args.new)):
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Local stand-ins for the Voyage and OpenAI clients with a configurable latency."""
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+def fake_embedding(text: str, dim: int = 1024) -> list[float]:
+    """Deterministic pseudo-embedding, so the same text always ranks the same."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32).tolist()
+
+class FakeVoyageClient:
+    """Sync client shaped like voyageai.Client (get_voyage_embedding)."""
+
+    def __init__(self, latency_ms: float = 0.0, dim: int = 1024):
+        self.latency = latency_ms / 1000.0
+        self.dim = dim
+        self.calls = 0
+
+    def embed(self, texts, model: str = "", input_type: str = ""):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        texts = [texts] if isinstance(texts, str) else texts
+        return SimpleNamespace(embeddings=[fake_embedding(t, self.dim) for t in texts])
+
+class FakeAsyncVoyageClient(FakeVoyageClient):
+    """Async client shaped like AsyncVoyageClient (the embedding batcher)."""
+
+    async def embed(self, texts, model: str = "", input_type: str = ""):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(embeddings=[fake_embedding(t, self.dim) for t in texts])
+
+    async def aclose(self) -> None:
+        pass
+
+class _FakeStream:
+    def __init__(self, tokens: list[str], token_latency: float):
+        self._tokens = tokens
+        self._token_latency = token_latency
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for token in self._tokens:
+            if self._token_latency:
+                await asyncio.sleep(self._token_latency)
+            delta = SimpleNamespace(content=token)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAIClient"):
+        self._owner = owner
+
+    async def create(self, messages, stream: bool = False, **params):
+        owner = self._owner
+        owner.calls += 1
+        if owner.latency:
+            await asyncio.sleep(owner.latency)
+        text = owner.reply
+        if stream:
+            tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+            return _FakeStream(tokens, owner.token_latency)
+        message = SimpleNamespace(content=text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class FakeOpenAIClient:
+    """Async client shaped like openai.AsyncOpenAI for chat.completions.create.
+
+    latency_ms is the time to first token; streamed replies add
+    token_latency_ms per 4-character chunk."""
+
+    def __init__(self, latency_ms: float = 0.0, token_latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.token_latency = token_latency_ms / 1000.0
+        self.reply = "這位藝人的形象與品牌語氣高度契合，能有效觸及品牌的核心族群。"
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,139 @@
+"""Synthetic stand-ins for assets/: df_joined, df_persona, brand descriptions
+and small Keras models with the same input/output shapes as the real ones."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.data_loader import (
+    AGE_BUCKET_COLS,
+    brand_cols,
+    celeb_vec_cols,
+    demographic_cols,
+    product_cat_cols,
+)
+
+FIXTURE_MANIFEST = "fixture.json"
+
+def make_frames(
+    n_artists: int,
+    n_brands: int,
+    max_brands_per_artist: int,
+    seed: int,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    artists = np.array([f"artist{i}" for i in range(n_artists)])
+    brands = np.array([f"brand{i}" for i in range(n_brands)])
+
+    # each artist endorses 1..max_brands_per_artist distinct brands, one row each
+    counts = rng.integers(1, max_brands_per_artist + 1, size=n_artists)
+    row_artist = np.repeat(np.arange(n_artists), counts)
+    row_brand = rng.integers(0, n_brands, size=len(row_artist))
+    n_rows = len(row_artist)
+
+    artist_vecs = rng.normal(size=(n_artists, len(celeb_vec_cols))).astype(np.float32)
+    brand_vecs = rng.normal(size=(n_brands, len(brand_cols))).astype(np.float32)
+    gender = rng.integers(0, 2, size=n_artists).astype(np.float32)
+
+    columns = {
+        "artist": artists[row_artist],
+        "brand": brands[row_brand],
+    }
+    frame = pd.concat(
+        [
+            pd.DataFrame(columns),
+            pd.DataFrame(artist_vecs[row_artist], columns=celeb_vec_cols),
+            pd.DataFrame(brand_vecs[row_brand], columns=brand_cols),
+            pd.DataFrame({"gender": gender[row_artist]}),
+            pd.DataFrame(
+                (rng.random((n_rows, len(AGE_BUCKET_COLS))) < 0.3).astype(np.float32),
+                columns=AGE_BUCKET_COLS,
+            ),
+            pd.DataFrame(
+                (rng.random((n_rows, len(product_cat_cols))) < 0.15).astype(np.float32),
+                columns=product_cat_cols,
+            ),
+        ],
+        axis=1,
+    )
+    # real rows are not grouped by artist
+    df_joined = frame.iloc[rng.permutation(n_rows)].reset_index(drop=True)
+
+    df_persona = pd.DataFrame({
+        "artist": artists,
+        "persona": [f"{a} 的形象穩健親和，適合生活與家庭相關品牌。" for a in artists],
+    })
+    brand_personality = pd.DataFrame({
+        "brand": brands,
+        "brand_personality_summary": [f"{b} 以專業與創新為核心。" for b in brands],
+    })
+    return df_joined, df_persona, brand_personality
+
+def make_models(model_dir: str, embed_dim: int, seed: int) -> None:
+    """Save brand_encoder/celeb_proj .keras models and their NumPy exports."""
+    import tensorflow as tf
+
+    from app.artifacts import file_sha256
+    from app.inference import export_keras_model, l2_normalize_layer
+
+    tf.keras.utils.set_random_seed(seed)
+    inputs = {
+        "brand_encoder_model": len(brand_cols) + len(demographic_cols) + len(product_cat_cols),
+        "celeb_proj_model": len(celeb_vec_cols),
+    }
+    for name, input_dim in inputs.items():
+        model = tf.keras.Sequential([
+            tf.keras.Input(shape=(input_dim,)),
+            tf.keras.layers.Dense(256, activation="relu"),
+            tf.keras.layers.Dense(embed_dim, activation="relu"),
+            tf.keras.layers.Dense(embed_dim),
+            tf.keras.layers.Lambda(l2_normalize_layer),
+        ])
+        keras_path = os.path.join(model_dir, f"{name}.keras")
+        model.save(keras_path)
+        export_keras_model(model, file_sha256(keras_path)).save(
+            os.path.join(model_dir, f"{name}.npz")
+        )
+
+def build_fixture(
+    asset_dir: str,
+    n_artists: int,
+    n_brands: int,
+    max_brands_per_artist: int = 5,
+    embed_dim: int = 128,
+    seed: int = 0,
+) -> dict:
+    """Write a fixture to asset_dir (data/ and models/), reusing it when the
+    parameters match the one already there. Returns the parameters."""
+    params = {
+        "n_artists": n_artists,
+        "n_brands": n_brands,
+        "max_brands_per_artist": max_brands_per_artist,
+        "embed_dim": embed_dim,
+        "seed": seed,
+    }
+    manifest_path = os.path.join(asset_dir, FIXTURE_MANIFEST)
+    try:
+        with open(manifest_path, encoding="utf-8") as fh:
+            if json.load(fh) == params:
+                return params
+    except (OSError, ValueError):
+        pass
+
+    data_dir = os.path.join(asset_dir, "data")
+    model_dir = os.path.join(asset_dir, "models")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+
+    df_joined, df_persona, brand_personality = make_frames(
+        n_artists, n_brands, max_brands_per_artist, seed
+    )
+    df_joined.to_pickle(os.path.join(data_dir, "df_joined.pkl"))
+    df_persona.to_pickle(os.path.join(data_dir, "df_persona.pkl"))
+    brand_personality.to_pickle(os.path.join(data_dir, "brand_personality_description.pkl"))
+    make_models(model_dir, embed_dim, seed)
+
+    with open(manifest_path, "w", encoding="utf-8") as fh:
+        json.dump(params, fh, indent=2)
+    return params
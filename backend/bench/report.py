@@ -0,0 +1,77 @@
+"""Latency summaries and JSON reports that can be compared across commits."""
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+def summarize(latencies_ms: list[float], wall_s: float, errors: int = 0) -> dict:
+    lat = np.asarray(latencies_ms, dtype=np.float64)
+    summary = {"n": int(len(lat)), "errors": errors}
+    if len(lat):
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(float(np.percentile(lat, p)), 3)
+        summary["mean_ms"] = round(float(lat.mean()), 3)
+        summary["max_ms"] = round(float(lat.max()), 3)
+    summary["throughput_rps"] = round(len(lat) / wall_s, 2) if wall_s > 0 else None
+    return summary
+
+def _git(*args: str) -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip()
+
+def report_meta(params: dict) -> dict:
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+def write_report(path: str, report: dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, ensure_ascii=False, indent=2)
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+def _pct(base: float | None, new: float | None) -> str:
+    if not base or new is None:
+        return ""
+    return f"{(new - base) / base * 100:+.1f}%"
+
+def compare_reports(base: dict, new: dict) -> list[str]:
+    """Side-by-side table of every benchmark present in both reports."""
+    lines = [
+        f"base: {base['meta'].get('commit')}  new: {new['meta'].get('commit')}",
+        f"{'benchmark':<52}{'metric':>16}{'base':>12}{'new':>12}{'change':>10}",
+    ]
+    if base["meta"].get("params") != new["meta"].get("params"):
+        lines.insert(1, "warning: the reports were run with different parameters")
+    for section in ("services", "endpoints", "replay"):
+        for name, b in base.get(section, {}).items():
+            n = new.get(section, {}).get(name)
+            if n is None:
+                continue
+            for metric in [f"p{p}_ms" for p in PERCENTILES] + ["throughput_rps"]:
+                bv, nv = b.get(metric), n.get(metric)
+                if bv is None and nv is None:
+                    continue
+                label = f"{section}/{name}" if metric == "p50_ms" else ""
+                lines.append(f"{label:<52}{metric:>16}{bv!s:>12}{nv!s:>12}{_pct(bv, nv):>10}")
+    return lines
@@ -0,0 +1,316 @@
+"""Benchmark the services and HTTP endpoints on synthetic data with fake clients.
+
+Usage (from backend/):
+    python -m bench.run [--artists 2000] [--brands 500] [--iterations 200]
+                        [--concurrency 8] [--voyage-ms 30] [--openai-ms 300]
+                        [--replay traffic.jsonl] [--out bench/results/run.json]
+    python -m bench.compare bench/results/base.json bench/results/run.json
+
+The synthetic fixture (data pickles plus small Keras models) is written
+once per parameter set under --asset-dir and reused. Voyage and OpenAI are
+replaced by local fakes with fixed latency, so runs are repeatable offline.
+
+Replay files use the requests.jsonl layout, one JSON object per line. A
+line with `method`/`path` (and optional `json`) is sent as is. Any other
+line, e.g. {request_id, title, body}, becomes a by-description query built
+from its title and body.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--brands", type=int, default=500)
+    parser.add_argument("--max-brands-per-artist", type=int, default=5)
+    parser.add_argument("--embed-dim", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--asset-dir", default="", help="default: bench/.fixtures/<params>")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="in-flight HTTP requests")
+    parser.add_argument("--voyage-ms", type=float, default=30.0)
+    parser.add_argument("--openai-ms", type=float, default=300.0, help="time to first token")
+    parser.add_argument("--openai-token-ms", type=float, default=5.0)
+    parser.add_argument("--only", choices=["services", "endpoints", "replay"], action="append")
+    parser.add_argument("--replay", default="", help="JSONL traffic file to replay")
+    parser.add_argument("--out", default="")
+    return parser.parse_args()
+
+def _configure_env(asset_dir: str) -> None:
+    # must run before anything under app/ is imported: config reads these once
+    os.environ["ASSET_DIR"] = asset_dir
+    os.environ["VOYAGE_API_KEY"] = "bench"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["EMBED_CACHE_DIR"] = ""
+    os.environ["ASSET_WATCH_INTERVAL"] = "0"
+
+def _description(rng: random.Random, i: int) -> str:
+    words = ["年輕", "時尚", "科技", "家庭", "運動", "精品", "環保", "美妝", "旅行", "美食"]
+    picked = "、".join(rng.sample(words, 3))
+    return f"我們是一個強調{picked}的品牌，希望觸及都會上班族。#{i}"
+
+def _time_sync(fn, calls: list[tuple[tuple, dict]]) -> tuple[list[float], float, int]:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for args, kwargs in calls:
+        t0 = time.perf_counter()
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return latencies, time.perf_counter() - start, errors
+
+async def _time_async(fn, calls: list[tuple[tuple, dict]]) -> tuple[list[float], float, int]:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for args, kwargs in calls:
+        t0 = time.perf_counter()
+        try:
+            await fn(*args, **kwargs)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return latencies, time.perf_counter() - start, errors
+
+async def _bench_services(args, rng: random.Random, brands: list[str], artists: list[str]) -> dict:
+    from app.services.llm import build_recommendation_pitch
+    from app.services.recommend import (
+        get_similar_artists,
+        recommend_artists_by_description,
+        recommend_artists_for_brand,
+    )
+    from bench.report import summarize
+
+    n = args.iterations
+    filtered = {"artist_gender_filter": "F", "min_age": 20, "max_age": 50, "product_cats": ["美妝保養"]}
+    sync_benches = {
+        "recommend_artists_for_brand": (
+            recommend_artists_for_brand,
+            [((rng.choice(brands),), {"top_k": 10}) for _ in range(n)],
+        ),
+        "recommend_artists_for_brand[filtered]": (
+            recommend_artists_for_brand,
+            [((rng.choice(brands),), {"top_k": 10, **filtered}) for _ in range(n)],
+        ),
+        "recommend_artists_by_description": (
+            recommend_artists_by_description,
+            [((_description(rng, i),), {"top_k": 10}) for i in range(n)],
+        ),
+        "get_similar_artists": (
+            get_similar_artists,
+            [((rng.choice(artists),), {"top_k": 5}) for _ in range(n)],
+        ),
+    }
+    results = {}
+    for name, (fn, calls) in sync_benches.items():
+        results[name] = summarize(*_time_sync(fn, calls))
+        print(f"services/{name}: {results[name]}")
+
+    calls = [((rng.choice(brands), rng.choice(artists)), {}) for _ in range(n)]
+    results["build_recommendation_pitch"] = summarize(
+        *await _time_async(build_recommendation_pitch, calls)
+    )
+    print(f"services/build_recommendation_pitch: {results['build_recommendation_pitch']}")
+    return results
+
+async def _run_load(client, requests: list[dict], concurrency: int) -> dict[str, tuple]:
+    """Send `requests` with at most `concurrency` in flight; per-label latencies."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+    by_label: dict[str, list] = {}
+
+    async def send(req: dict) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            ok = True
+            try:
+                resp = await client.request(req["method"], req["path"], json=req.get("json"))
+                ok = resp.status_code < 500
+            except Exception:
+                ok = False
+            lat = (time.perf_counter() - t0) * 1000.0
+        entry = by_label.setdefault(req["label"], [[], 0])
+        entry[0].append(lat)
+        entry[1] += 0 if ok else 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(r) for r in requests))
+    wall = time.perf_counter() - start
+    return {label: (lat, wall, errors) for label, (lat, errors) in by_label.items()}
+
+def _endpoint_requests(args, rng: random.Random, brands: list[str], artists: list[str]) -> dict:
+    n = args.iterations
+
+    def batch_payload(i: int) -> dict:
+        queries = [{"brand": rng.choice(brands), "topK": 10} for _ in range(12)]
+        queries += [{"description": _description(rng, i * 100 + j), "topK": 10} for j in range(4)]
+        return {"queries": queries}
+
+    return {
+        "GET /recommendations/{brand}": [
+            {"method": "GET", "path": f"/recommendations/{rng.choice(brands)}?topK=10"}
+            for _ in range(n)
+        ],
+        "POST /recommendations/by-description": [
+            {
+                "method": "POST",
+                "path": "/recommendations/by-description",
+                "json": {"description": _description(rng, n + i), "topK": 10},
+            }
+            for i in range(n)
+        ],
+        "POST /recommendations/batch": [
+            {"method": "POST", "path": "/recommendations/batch", "json": batch_payload(i)}
+            for i in range(max(1, n // 10))
+        ],
+        "GET /candidate/{artist}": [
+            {"method": "GET", "path": f"/candidate/{rng.choice(artists)}?brand={rng.choice(brands)}"}
+            for _ in range(n)
+        ],
+        "GET /explanation/{brand}/{artist}": [
+            {"method": "GET", "path": f"/explanation/{rng.choice(brands)}/{rng.choice(artists)}"}
+            for _ in range(n)
+        ],
+        "GET /explanation/{brand}/{artist}/stream": [
+            {"method": "GET", "path": f"/explanation/{rng.choice(brands)}/{rng.choice(artists)}/stream"}
+            for _ in range(n)
+        ],
+    }
+
+def load_replay(path: str) -> list[dict]:
+    requests = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if "path" in rec:
+                method = rec.get("method", "GET").upper()
+                requests.append({
+                    "method": method,
+                    "path": rec["path"],
+                    "json": rec.get("json"),
+                    "label": rec.get("label") or f"{method} {rec['path'].split('?')[0]}",
+                })
+            else:
+                text = "\n".join(str(rec.get(k, "")) for k in ("title", "body")).strip()
+                requests.append({
+                    "method": "POST",
+                    "path": "/recommendations/by-description",
+                    "json": {"description": text, "topK": 10},
+                    "label": "POST /recommendations/by-description",
+                })
+    return requests
+
+async def _bench_http(app, args, rng, brands, artists, sections) -> tuple[dict, dict]:
+    import httpx
+
+    from bench.report import summarize
+
+    endpoints, replay = {}, {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if "endpoints" in sections:
+            for label, requests in _endpoint_requests(args, rng, brands, artists).items():
+                for req in requests:
+                    req["label"] = label
+                lat, wall, errors = (await _run_load(client, requests, args.concurrency))[label]
+                endpoints[label] = summarize(lat, wall, errors)
+                print(f"endpoints/{label}: {endpoints[label]}")
+        if "replay" in sections and args.replay:
+            requests = load_replay(args.replay)
+            start = time.perf_counter()
+            per_label = await _run_load(client, requests, args.concurrency)
+            wall = time.perf_counter() - start
+            all_lat = [x for lat, _, _ in per_label.values() for x in lat]
+            replay["total"] = summarize(all_lat, wall, sum(e for _, _, e in per_label.values()))
+            for label, (lat, _, errors) in per_label.items():
+                replay[label] = summarize(lat, wall, errors)
+            print(f"replay/total: {replay['total']}")
+    return endpoints, replay
+
+async def _main_async(args, params: dict) -> dict:
+    from bench.fakes import FakeAsyncVoyageClient, FakeOpenAIClient, FakeVoyageClient
+    from bench.report import report_meta
+
+    t0 = time.perf_counter()
+    import main
+    from app.services.assets import load_and_warm
+
+    load_and_warm()  # what the server runs in the background before /ready
+    startup_s = time.perf_counter() - t0
+
+    from app.data_loader import get_snapshot
+    from app.services import embedding, llm
+    from app.services.response_cache import response_cache_stats
+
+    embedding._voyage_client = FakeVoyageClient(args.voyage_ms)
+    embedding.get_embedding_batcher(FakeAsyncVoyageClient(args.voyage_ms))
+    llm._openai_client = FakeOpenAIClient(args.openai_ms, args.openai_token_ms)
+
+    snapshot = get_snapshot()
+    brands = sorted(snapshot.brand_embed_index)
+    artists = [str(a) for a in snapshot.artist_names]
+    rng = random.Random(args.seed)
+    sections = set(args.only or ["services", "endpoints", "replay"])
+
+    report = {"meta": report_meta(params), "startup_s": round(startup_s, 3)}
+    report["meta"]["snapshot_version"] = snapshot.version
+    if "services" in sections:
+        report["services"] = await _bench_services(args, rng, brands, artists)
+    report["endpoints"], report["replay"] = await _bench_http(
+        main.app, args, rng, brands, artists, sections
+    )
+    report["counters"] = {
+        "voyage_sync_calls": embedding._voyage_client.calls,
+        "voyage_batch_calls": embedding.get_embedding_batcher().client.calls,
+        "openai_calls": llm._openai_client.calls,
+        "embedding_cache": embedding.embedding_cache_stats(),
+        "pitch_cache": llm.pitch_cache_stats(),
+        "response_cache": response_cache_stats(),
+    }
+    return report
+
+def main():
+    args = _parse_args()
+    fixture = {
+        "n_artists": args.artists,
+        "n_brands": args.brands,
+        "max_brands_per_artist": args.max_brands_per_artist,
+        "embed_dim": args.embed_dim,
+        "seed": args.seed,
+    }
+    asset_dir = args.asset_dir or os.path.join(
+        BENCH_DIR, ".fixtures", f"a{args.artists}-b{args.brands}-d{args.embed_dim}-s{args.seed}"
+    )
+    _configure_env(asset_dir)
+
+    from bench.fixtures import build_fixture
+    from bench.report import write_report
+
+    build_fixture(asset_dir, **fixture)
+    params = {
+        "fixture": fixture,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "voyage_ms": args.voyage_ms,
+        "openai_ms": args.openai_ms,
+        "openai_token_ms": args.openai_token_ms,
+        "replay": os.path.basename(args.replay) if args.replay else None,
+    }
+    report = asyncio.run(_main_async(args, params))
+
+    out = args.out or os.path.join(
+        BENCH_DIR, "results", f"{(report['meta']['commit'] or 'local')[:10]}-{int(time.time())}.json"
+    )
+    write_report(out, report)
+    print(f"wrote {out}")
+
+if __name__ == "__main__":
+    main()
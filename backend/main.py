@@ -1,3 +1,7 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,21 +10,62 @@ from app.config import (
     APP_NAME,
     APP_VERSION,
     APP_DESC,
+    ASSET_WATCH_INTERVAL,
+    METRICS_ENABLED,
 )
 
-import app.data_loader  # noqa: F401
-
 from app.routers.recommend_router import router as rec_router
 from app.routers.candidate_router import router as cand_router
 from app.routers.explanation_router import router as explain_router
 from app.routers.health_router import router as health_router
+from app.routers.admin_router import router as admin_router
+from app.routers.metrics_router import router as metrics_router
+from app.services.assets import (
+    NotReadyMiddleware,
+    add_swap_listener,
+    start_background_load,
+    watch_assets,
+)
+from app.services.embedding import close_embedding_client
+from app.services.llm import close_openai_client
+from app.services.executor import shutdown_executor
+from app.services.metrics import MetricsMiddleware
+from app.services.response_cache import ResponseCacheMiddleware, clear_response_cache
+from app.services.pagination import clear_cursors
+
+# entries are keyed by version already; clearing just frees the old ones
+add_swap_listener(lambda new, previous: clear_response_cache())
+# cursors pin the old snapshot; drop them so its arrays can be freed
+add_swap_listener(lambda new, previous: clear_cursors())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # /health answers right away; /ready turns 200 once the assets are loaded and warm
+    start_background_load()
+    watcher = None
+    if ASSET_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_assets(ASSET_WATCH_INTERVAL))
+    yield
+    if watcher is not None:
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
+    await close_embedding_client()
+    await close_openai_client()
+    shutdown_executor()
 
 app = FastAPI(
     title=APP_NAME,
     description=APP_DESC,
     version=APP_VERSION,
+    lifespan=lifespan,
 )
 
+# inside CORS, so cached responses never replay another origin's CORS headers
+app.add_middleware(ResponseCacheMiddleware)
+# also inside CORS, so browsers can read the 503 while the assets load
+app.add_middleware(NotReadyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ALLOW_ORIGINS,
@@ -29,8 +74,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # 掛上各 router
 app.include_router(rec_router)
 app.include_router(cand_router)
 app.include_router(explain_router)
-app.include_router(health_router)
\ No newline at end of file
+app.include_router(health_router)
+app.include_router(admin_router)
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
\ No newline at end of file
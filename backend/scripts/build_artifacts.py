@@ -0,0 +1,47 @@
+"""Write the derived arrays to versioned .npy files under assets/derived/.
+
+Usage (from backend/):
+    python -m scripts.build_artifacts [--force] [--prune]
+
+Each build lives in assets/derived/<version[:16]>/ with a manifest that
+records the sha256 of df_joined.pkl and both .keras models. The server
+memory-maps the build whose hash matches its sources, so all workers share
+one copy; when it is missing, the first worker builds it under a file lock
+while the others wait.
+"""
+import argparse
+
+from app import data_loader
+from app.artifacts import artifact_dir, build_lock, prune_artifacts, save_artifacts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--force", action="store_true", help="recompute even if up to date")
+    parser.add_argument("--prune", action="store_true", help="delete builds of other versions")
+    args = parser.parse_args()
+
+    snapshot = data_loader.get_snapshot()
+    version = snapshot.artifact_version
+    if snapshot.derived_from_cache and not args.force:
+        print(f"up to date: {artifact_dir(data_loader.DERIVED_DIR, version)}")
+    else:
+        # without a mapped build the load already computed everything in memory
+        arrays = (
+            data_loader.compute_derived_arrays(
+                snapshot.brand_encoder, snapshot.celeb_proj, version
+            )
+            if snapshot.derived_from_cache
+            else snapshot.derived_arrays
+        )
+        with build_lock(data_loader.DERIVED_DIR):
+            path = save_artifacts(
+                data_loader.DERIVED_DIR, version, arrays, snapshot.source_hashes
+            )
+        print(f"wrote {len(arrays)} arrays to {path}")
+
+    if args.prune:
+        for path in prune_artifacts(data_loader.DERIVED_DIR, version):
+            print(f"removed {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Export brand_encoder / celeb_proj from .keras to NumPy .npz and check parity.
+
+Usage (from backend/):
+    python -m scripts.export_weights [--check-only] [--atol 1e-4]
+
+This is the only place the serving stack needs TensorFlow. Each .npz is
+stamped with the sha256 of its .keras file; the server ignores stale
+exports and falls back to Keras. The parity check compares both forward
+passes on random inputs and on real feature rows when df_joined.pkl is
+available, and exits non-zero when they disagree.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from app.artifacts import file_sha256
+from app.config import ASSET_DIR
+from app.inference import export_keras_model, load_keras_model, load_numpy_model
+
+# same locations as app.data_loader, so an ASSET_DIR override applies to both
+MODEL_DIR = os.path.join(ASSET_DIR, "models")
+DATA_DIR = os.path.join(ASSET_DIR, "data")
+
+MODEL_NAMES = ["brand_encoder_model", "celeb_proj_model"]
+
+def _sample_inputs(model, n: int, seed: int) -> np.ndarray:
+    dim = model.input_shape[-1]
+    rng = np.random.default_rng(seed)
+    samples = [rng.normal(size=(n, dim)).astype(np.float32)]
+
+    df_path = os.path.join(DATA_DIR, "df_joined.pkl")
+    if os.path.exists(df_path):
+        df = pd.read_pickle(df_path)
+        if dim == 1024:
+            cols = [f"dim{i}" for i in range(1024)]
+        else:
+            from app.data_loader import brand_feature_cols as cols
+        if all(c in df.columns for c in cols):
+            rows = df[cols].sample(min(n, len(df)), random_state=seed)
+            samples.append(rows.to_numpy().astype(np.float32))
+    return np.concatenate(samples)
+
+def _check(name: str, keras_model, n: int, atol: float, seed: int) -> bool:
+    npz_path = os.path.join(MODEL_DIR, f"{name}.npz")
+    numpy_model = load_numpy_model(npz_path)
+    x = _sample_inputs(keras_model, n, seed)
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(x) else 0.0
+    ok = max_diff <= atol
+    print(f"{name}: {len(x)} inputs, max |keras - numpy| = {max_diff:.2e} ({'ok' if ok else 'FAIL'})")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check-only", action="store_true")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ok = True
+    for name in MODEL_NAMES:
+        keras_path = os.path.join(MODEL_DIR, f"{name}.keras")
+        keras_model = load_keras_model(keras_path)
+        if not args.check_only:
+            exported = export_keras_model(keras_model, source_sha256=file_sha256(keras_path))
+            exported.save(os.path.join(MODEL_DIR, f"{name}.npz"))
+            print(f"exported {name}.npz ({len(exported.layers)} dense layers)")
+        ok = _check(name, keras_model, args.samples, args.atol, args.seed) and ok
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Precompute the ranked artists of every known brand for common filters.
+
+Usage (from backend/):
+    python -m scripts.precompute_topk [--top-k 50] [--ages 10-20,20-30,...] [--prune]
+
+Writes assets/precomputed/<version[:16]>/, versioned by the same hash as
+assets/derived, for every gender (any / M / F) crossed with no age filter
+and each age range in --ages (default: every AGE_BUCKET_COLS bucket).
+GET /recommendations/{brand} serves these lists directly while the assets,
+SEARCH_BACKEND and its parameters (IVF_N_LISTS / IVF_N_PROBE or
+SEARCH_QUANT_DTYPE / SEARCH_RERANK_K) match; other brands or filters are
+scored live. Re-run after build_artifacts or a search config change.
+"""
+import argparse
+import time
+
+from app.data_loader import AGE_BUCKET_COLS, PRECOMPUTED_DIR, get_snapshot
+from app.artifacts import build_lock, prune_artifacts
+from app.services.precomputed import save_topk_store
+from app.services.recommend import precompute_brand_top_k
+
+def _age_ranges(spec: str) -> list[tuple[int, int]]:
+    ranges = []
+    for part in spec.split(","):
+        if part.strip():
+            lo, hi = part.split("-")
+            ranges.append((int(lo), int(hi)))
+    return ranges
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top-k", type=int, default=50, help="largest topK served from the store")
+    parser.add_argument("--ages", default=",".join(AGE_BUCKET_COLS))
+    parser.add_argument("--prune", action="store_true", help="delete stores of other versions")
+    args = parser.parse_args()
+
+    snapshot = get_snapshot()
+    ages = [(None, None)] + _age_ranges(args.ages)
+    filters = [(gender, lo, hi) for gender in (None, "M", "F") for lo, hi in ages]
+
+    t0 = time.perf_counter()
+    combos, indices, sims = precompute_brand_top_k(filters, top_k=args.top_k, snapshot=snapshot)
+    with build_lock(PRECOMPUTED_DIR):
+        path = save_topk_store(snapshot, combos, indices, sims)
+    print(
+        f"wrote {len(snapshot.brand_names)} brands x {len(combos)} filters x top {indices.shape[2]} "
+        f"({(indices.nbytes + sims.nbytes) / 2**20:.1f} MiB) to {path} "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+
+    if args.prune:
+        for path in prune_artifacts(PRECOMPUTED_DIR, snapshot.artifact_version):
+            print(f"removed {path}")
+
+if __name__ == "__main__":
+    main()
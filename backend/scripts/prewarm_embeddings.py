@@ -0,0 +1,22 @@
+"""Pre-warm the Voyage embedding cache from a file of known descriptions.
+
+Usage (from backend/):
+    python -m scripts.prewarm_embeddings descriptions.txt
+
+The file holds one description per line; already cached lines are skipped.
+"""
+import argparse
+
+from app.services.embedding import embedding_cache_stats, prewarm_embedding_cache
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    fetched = prewarm_embedding_cache(args.path)
+    print(f"fetched {fetched} new embeddings")
+    print(embedding_cache_stats())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Recall-vs-latency report for the search backends.
+
+Usage (from backend/):
+    python -m scripts.search_report --k 10 --queries 200 --n-lists 0 --probes 1,2,4,8,16,32 \
+        --quant int8,float16 --rerank 0,64,256
+
+Queries are brand rows from the precomputed brand index, so the numbers
+reflect /recommendations/{brand} traffic. Recall@K is measured against
+the exact backend's top-K artists. The memory column is the resident
+size of the scanned index (the quantized backends also read the float32
+rows of the re-ranked artists from the memory-mapped array).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.data_loader import get_snapshot
+from app.services.context_data import top_k_indices
+from app.services.search import make_search_backend
+
+def _timed_scores(backend, queries: np.ndarray, **kwargs):
+    out, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        out.append(backend.artist_scores(q, **kwargs)[0])
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return out, np.array(latencies)
+
+def _recall(exact_top: list[np.ndarray], approx_scores: list[np.ndarray], k: int) -> float:
+    hits = [
+        len(np.intersect1d(truth, top_k_indices(scores, k))) / max(len(truth), 1)
+        for truth, scores in zip(exact_top, approx_scores)
+    ]
+    return float(np.mean(hits)) if hits else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-lists", type=int, default=0)
+    parser.add_argument("--probes", default="1,2,4,8,16,32")
+    parser.add_argument("--quant", default="int8,float16")
+    parser.add_argument("--rerank", default="0,64,256")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    snapshot = get_snapshot()
+    all_brand_embeds, all_celeb_embeds = snapshot.all_brand_embeds, snapshot.all_celeb_embeds
+    rng = np.random.default_rng(args.seed)
+    n_q = min(args.queries, len(all_brand_embeds))
+    queries = all_brand_embeds[rng.choice(len(all_brand_embeds), n_q, replace=False)]
+
+    exact = make_search_backend("exact")
+    exact_scores, exact_lat = _timed_scores(exact, queries)
+    exact_top = [top_k_indices(s, args.k) for s in exact_scores]
+
+    t0 = time.perf_counter()
+    ivf = make_search_backend("ivf", n_lists=args.n_lists)
+    build_s = time.perf_counter() - t0
+
+    def row(label: str, recall: float, lat: np.ndarray, nbytes: int) -> None:
+        print(
+            f"{label:<24}{recall:>10.3f}{lat.mean():>10.3f}"
+            f"{np.percentile(lat, 95):>10.3f}{nbytes / 2**20:>12.2f}"
+        )
+
+    print(f"rows={len(all_celeb_embeds)} queries={n_q} k={args.k}")
+    print(f"ivf n_lists={ivf.n_lists} build={build_s:.2f}s")
+    print(f"{'backend':<24}{'recall@k':>10}{'mean ms':>10}{'p95 ms':>10}{'memory MiB':>12}")
+    row("exact", 1.0, exact_lat, all_celeb_embeds.nbytes)
+
+    for n_probe in (int(p) for p in args.probes.split(",") if p.strip()):
+        if n_probe > ivf.n_lists:
+            continue
+        scores, lat = _timed_scores(ivf, queries, n_probe=n_probe)
+        row(f"ivf probe={n_probe}", _recall(exact_top, scores, args.k), lat, all_celeb_embeds.nbytes)
+
+    for dtype in (d.strip() for d in args.quant.split(",") if d.strip()):
+        quant = make_search_backend("quantized", dtype=dtype)
+        for rerank_k in (int(r) for r in args.rerank.split(",") if r.strip()):
+            scores, lat = _timed_scores(quant, queries, rerank_k=rerank_k)
+            row(f"{dtype} rerank={rerank_k}", _recall(exact_top, scores, args.k), lat, quant.nbytes)
+
+if __name__ == "__main__":
+    main()
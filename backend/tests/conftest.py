@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import data_loader
+from app.data_loader import (
+    AGE_BUCKET_COLS,
+    AssetSnapshot,
+    brand_cols,
+    celeb_vec_cols,
+    compute_derived_arrays,
+    product_cat_cols,
+)
+
+EMBED_DIM = 16
+
+class LinearModel:
+    """Stand-in for a Keras model: predict(x) = x @ weights."""
+
+    def __init__(self, in_dim: int, out_dim: int, rng: np.random.Generator):
+        self.weights = rng.normal(size=(in_dim, out_dim)).astype(np.float32)
+
+    def predict(self, x, verbose=0):
+        return np.asarray(x, dtype=np.float32) @ self.weights
+
+# artist -> (gender per row, age buckets, product categories); artist "u" has no gender
+ARTISTS = {
+    "m_young": ([1.0], ["20-30"], ["美妝保養"]),
+    "m_old": ([1.0, 1.0], ["50-60"], ["汽車機車自行車"]),
+    "m_mostly": ([1.0, 1.0, 0.0], ["30-40"], []),
+    "f_young": ([0.0], ["10-20", "20-30"], ["美妝保養", "鞋包服飾"]),
+    "f_mid": ([0.0, 0.0], ["40-50"], ["居家生活"]),
+    "f_mostly": ([0.0, 1.0, 0.0], ["60-70"], ["美妝保養"]),
+    "u": ([np.nan, np.nan], ["20-30"], ["美妝保養"]),
+}
+BRANDS = ["brand_a", "brand_b", "brand_c"]
+# the brand feature row carries the gender column, so "u" gets a brand of its own
+UNKNOWN_GENDER_BRAND = "brand_u"
+
+def synthetic_frame(rng: np.random.Generator) -> pd.DataFrame:
+    """A few rows per artist, each endorsing one of BRANDS (or UNKNOWN_GENDER_BRAND)."""
+    artist_vecs = {a: rng.normal(size=len(celeb_vec_cols)) for a in ARTISTS}
+    brand_vecs = {b: rng.normal(size=len(brand_cols)) for b in BRANDS + [UNKNOWN_GENDER_BRAND]}
+    rows = []
+    for artist, (genders, ages, cats) in ARTISTS.items():
+        for i, gender in enumerate(genders):
+            brand = BRANDS[(len(rows) + i) % len(BRANDS)] if artist != "u" else UNKNOWN_GENDER_BRAND
+            row = {"artist": artist, "brand": brand, "gender": gender}
+            row.update({col: float(col in ages) for col in AGE_BUCKET_COLS})
+            row.update({col: float(col in cats) for col in product_cat_cols})
+            row.update(zip(celeb_vec_cols, artist_vecs[artist] + rng.normal(scale=0.1, size=len(celeb_vec_cols))))
+            row.update(zip(brand_cols, brand_vecs[brand]))
+            rows.append(row)
+    return pd.DataFrame(rows).sort_values("artist", kind="stable").reset_index(drop=True)
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    """A small AssetSnapshot built from synthetic_frame with linear stand-in models."""
+    monkeypatch.setattr(data_loader, "DERIVED_DIR", str(tmp_path / "derived"))
+    rng = np.random.default_rng(0)
+    df = synthetic_frame(rng)
+    brand_encoder = LinearModel(len(data_loader.brand_feature_cols), EMBED_DIM, rng)
+    celeb_proj = LinearModel(len(celeb_vec_cols), EMBED_DIM, rng)
+    derived = compute_derived_arrays(brand_encoder, celeb_proj, "test", df_joined=df)
+    return AssetSnapshot(
+        version="test",
+        artifact_version="test",
+        source_hashes={},
+        brand_encoder=brand_encoder,
+        celeb_proj=celeb_proj,
+        df_persona=pd.DataFrame({"artist": list(ARTISTS), "persona": ""}),
+        brand_personality=pd.DataFrame(),
+        derived_arrays=derived,
+        derived_from_cache=False,
+    )
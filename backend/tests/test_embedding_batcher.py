@@ -0,0 +1,137 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+class FakeEmbedError(Exception):
+    pass
+
+class FakeAsyncClient:
+    """Records every embed call; each text embeds to [len(text), 1, 0, 0]."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+        self.fail = False
+
+    async def embed(self, texts, model, input_type):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        embeddings = [[float(len(t)), 1.0, 0.0, 0.0] for t in texts]
+        return type("Response", (), {"embeddings": embeddings})()
+
+def _batcher(client, max_batch=64):
+    return EmbeddingBatcher(
+        client,
+        model="fake",
+        input_type="query",
+        max_batch=max_batch,
+        max_wait_ms=1.0,
+        error_cls=FakeEmbedError,
+    )
+
+def test_identical_concurrent_texts_share_one_call():
+    client = FakeAsyncClient()
+    batcher = _batcher(client)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed("hello") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert client.calls == [["hello"]]
+    assert batcher.coalesced == 4
+    for vec in results:
+        np.testing.assert_array_equal(vec, [5.0, 1.0, 0.0, 0.0])
+
+def test_max_batch_splits_large_batches():
+    client = FakeAsyncClient()
+    batcher = _batcher(client, max_batch=3)
+    texts = [f"text-{i}" for i in range(7)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(t) for t in texts))
+
+    results = asyncio.run(run())
+    assert [len(c) for c in client.calls] == [3, 3, 1]
+    assert sorted(t for c in client.calls for t in c) == sorted(texts)
+    assert batcher.stats() == {"batches": 3, "texts": 7, "coalesced": 0}
+    for text, vec in zip(texts, results):
+        assert vec[0] == len(text)
+
+def test_client_error_reaches_every_waiter_and_clears_inflight():
+    client = FakeAsyncClient()
+    client.fail = True
+    batcher = _batcher(client)
+
+    async def run_failing():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("a"), batcher.embed("b"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run_failing())
+    assert len(client.calls) == 1
+    assert all(isinstance(r, FakeEmbedError) for r in results)
+    assert batcher._inflight == {}
+
+    # the failed texts are not stuck: the next request goes upstream again
+    client.fail = False
+
+    async def run_again():
+        return await batcher.embed("a")
+
+    np.testing.assert_array_equal(asyncio.run(run_again()), [1.0, 1.0, 0.0, 0.0])
+    assert client.calls[-1] == ["a"]
+
+def test_wrong_number_of_embeddings_is_an_error():
+    class ShortClient(FakeAsyncClient):
+        async def embed(self, texts, model, input_type):
+            response = await super().embed(texts, model, input_type)
+            response.embeddings = response.embeddings[:-1]
+            return response
+
+    batcher = _batcher(ShortClient())
+
+    async def run():
+        return await asyncio.gather(batcher.embed("x"), batcher.embed("yy"))
+
+    with pytest.raises(FakeEmbedError):
+        asyncio.run(run())
+    assert batcher._inflight == {}
+
+def test_async_embedding_keeps_disk_io_off_the_event_loop(monkeypatch, tmp_path):
+    import threading
+
+    from app.services import embedding
+    from app.services.cache import LRUCache
+
+    client = FakeAsyncClient()
+    monkeypatch.setattr(embedding, "EMBED_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(embedding, "_memory_cache", LRUCache(16))
+    monkeypatch.setattr(embedding, "_batcher", _batcher(client))
+
+    disk_threads = []
+    for name in ("_disk_get", "_disk_set"):
+        original = getattr(embedding, name)
+
+        def record(*args, _original=original):
+            disk_threads.append(threading.get_ident())
+            return _original(*args)
+
+        monkeypatch.setattr(embedding, name, record)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await embedding.get_voyage_embedding_async("disk cached")
+        embedding._memory_cache.clear()
+        second = await embedding.get_voyage_embedding_async("disk cached")
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    np.testing.assert_array_equal(first, second)
+    assert len(client.calls) == 1  # the second call was served from disk
+    assert len(disk_threads) == 3  # miss, write, hit
+    assert loop_thread not in disk_threads
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from conftest import ARTISTS, BRANDS
+from app.data_loader import AGE_BUCKET_COLS, product_cat_cols
+from app.services import precomputed
+from app.services.precomputed import save_topk_store
+from app.services.recommend import (
+    artist_filter_mask,
+    get_artist_gender,
+    precompute_brand_top_k,
+    recommend_artists_for_brand,
+)
+
+def _selected(mask, snapshot) -> set[str]:
+    return {str(n) for n in snapshot.artist_names[mask]}
+
+def _recommended(snapshot, brand, **filters) -> set[str]:
+    recs = recommend_artists_for_brand(brand, top_k=len(ARTISTS), snapshot=snapshot, **filters)
+    return {r["name"] for r in recs}
+
+def test_artist_metadata_columns(snapshot):
+    gender = dict(zip(snapshot.artist_names, snapshot.artist_gender))
+    assert {a for a, g in gender.items() if g == 1.0} == {"m_young", "m_old", "m_mostly"}
+    assert {a for a, g in gender.items() if g == 0.0} == {"f_young", "f_mid", "f_mostly"}
+    assert np.isnan(gender["u"])
+    assert get_artist_gender("u", snapshot) is None
+
+    for name, age_bits, product_bits in zip(
+        snapshot.artist_names, snapshot.artist_age_bits, snapshot.artist_product_bits
+    ):
+        _, ages, cats = ARTISTS[str(name)]
+        assert {AGE_BUCKET_COLS[b] for b in range(8) if age_bits >> b & 1} == set(ages)
+        assert {c for b, c in enumerate(product_cat_cols) if product_bits >> b & 1} == set(cats)
+
+def test_no_filter_means_no_mask(snapshot):
+    assert artist_filter_mask(snapshot=snapshot) is None
+    assert artist_filter_mask("X", product_cats=["不存在", " "], snapshot=snapshot) is None
+
+def test_gender_mask_excludes_unknown_from_both(snapshot):
+    assert _selected(artist_filter_mask("M", snapshot=snapshot), snapshot) == {"m_young", "m_old", "m_mostly"}
+    assert _selected(artist_filter_mask("F", snapshot=snapshot), snapshot) == {"f_young", "f_mid", "f_mostly"}
+
+def test_unknown_gender_only_passes_unfiltered(snapshot):
+    for brand in BRANDS:
+        assert "u" in _recommended(snapshot, brand)
+        assert "u" not in _recommended(snapshot, brand, artist_gender_filter="M")
+        assert "u" not in _recommended(snapshot, brand, artist_gender_filter="F")
+
+@pytest.mark.parametrize(
+    "min_age, max_age, expected",
+    [
+        (20, 30, {"m_young", "f_young", "u"}),
+        (30, 60, {"m_mostly", "f_mid", "m_old"}),
+        (60, None, {"f_mostly"}),
+        (None, 20, {"f_young"}),
+        (25, 35, set()),  # no bucket lies fully inside the range
+    ],
+)
+def test_age_mask(snapshot, min_age, max_age, expected):
+    assert _selected(artist_filter_mask(None, min_age, max_age, snapshot=snapshot), snapshot) == expected
+
+def test_product_and_combined_masks(snapshot):
+    beauty = ["美妝保養"]
+    assert _selected(artist_filter_mask(product_cats=beauty, snapshot=snapshot), snapshot) == {
+        "m_young", "f_young", "f_mostly", "u"
+    }
+    assert _selected(
+        artist_filter_mask(product_cats=["居家生活", "汽車機車自行車"], snapshot=snapshot), snapshot
+    ) == {"f_mid", "m_old"}
+    assert _selected(artist_filter_mask("F", product_cats=beauty, snapshot=snapshot), snapshot) == {
+        "f_young", "f_mostly"
+    }
+    assert _selected(artist_filter_mask("F", 20, 30, beauty, snapshot), snapshot) == {"f_young"}
+
+def test_product_cats_on_brand_endpoint(snapshot, tmp_path, monkeypatch):
+    # productCats is never precomputed: enable the store to check it is bypassed
+    monkeypatch.setattr(precomputed, "PRECOMPUTED_DIR", str(tmp_path / "precomputed"))
+    monkeypatch.setattr(precomputed, "PRECOMPUTED_TOPK", True)
+    save_topk_store(snapshot, *precompute_brand_top_k([(None, None, None)], top_k=len(ARTISTS), snapshot=snapshot))
+
+    beauty = ["美妝保養"]
+    for brand in BRANDS:
+        assert _recommended(snapshot, brand) == set(ARTISTS)
+        assert _recommended(snapshot, brand, product_cats=beauty) == {"m_young", "f_young", "f_mostly", "u"}
+        assert _recommended(snapshot, brand, artist_gender_filter="M", product_cats=beauty) == {"m_young"}
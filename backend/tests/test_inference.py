@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip("tensorflow")
+
+from app.inference import export_keras_model, l2_normalize_layer, load_numpy_model
+
+def _randomize_batchnorm(model, rng):
+    # fresh BatchNormalization layers are the identity; give them real statistics
+    for layer in model.layers:
+        if type(layer).__name__ == "BatchNormalization":
+            gamma, beta, mean, var = layer.get_weights()
+            layer.set_weights([
+                rng.normal(1.0, 0.2, gamma.shape).astype(np.float32),
+                rng.normal(0.0, 0.2, beta.shape).astype(np.float32),
+                rng.normal(0.0, 0.5, mean.shape).astype(np.float32),
+                rng.uniform(0.5, 2.0, var.shape).astype(np.float32),
+            ])
+
+def _tiny_model(l2: bool):
+    layers = [
+        tf.keras.Input(shape=(12,)),
+        tf.keras.layers.Dense(16, activation="relu"),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.Dropout(0.5),
+        tf.keras.layers.Dense(8, activation="tanh"),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.Dense(6),
+    ]
+    if l2:
+        layers.append(tf.keras.layers.Lambda(l2_normalize_layer))
+    return tf.keras.Sequential(layers)
+
+@pytest.mark.parametrize("l2", [False, True])
+def test_numpy_export_matches_keras(l2, tmp_path):
+    rng = np.random.default_rng(0)
+    model = _tiny_model(l2)
+    _randomize_batchnorm(model, rng)
+    x = rng.normal(size=(32, 12)).astype(np.float32)
+
+    exported = export_keras_model(model, source_sha256="abc")
+    expected = model.predict(x, verbose=0)
+    np.testing.assert_allclose(exported.predict(x), expected, atol=1e-5)
+
+    # the .npz round trip serves the same outputs
+    path = str(tmp_path / "model.npz")
+    exported.save(path)
+    loaded = load_numpy_model(path)
+    assert loaded.source_sha256 == "abc"
+    assert loaded.l2_normalize == l2
+    np.testing.assert_allclose(loaded.predict(x), expected, atol=1e-5)
+
+def test_dropout_is_dropped_and_batchnorm_folded():
+    exported = export_keras_model(_tiny_model(False))
+    # three Dense layers, both BatchNormalizations folded into the next Dense
+    assert [act for _, _, act in exported.layers] == ["relu", "tanh", "linear"]
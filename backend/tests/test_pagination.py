@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from app.services import pagination
+from app.services.pagination import (
+    CursorError,
+    CursorExpiredError,
+    RankedScores,
+    encode_cursor,
+    next_page,
+)
+
+QUERY = ("brand", "brand1", None, None, None, ())
+
+@pytest.fixture(autouse=True)
+def _clean_cursors():
+    pagination.clear_cursors()
+    yield
+    pagination.clear_cursors()
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm90LWEtY3Vyc29y", encode_cursor("tok", 0)[:-2] + "!!"])
+def test_malformed_cursor_is_not_reported_as_expired(cursor):
+    with pytest.raises(CursorError) as info:
+        next_page(QUERY, cursor, 10)
+    assert not isinstance(info.value, CursorExpiredError)
+
+def test_cursor_of_another_query_is_not_reported_as_expired():
+    pagination._cursors.set("tok", RankedScores(QUERY, np.zeros(3, dtype=np.float32), None))
+    with pytest.raises(CursorError) as info:
+        next_page(("brand", "brand2", None, None, None, ()), encode_cursor("tok", 1), 10)
+    assert not isinstance(info.value, CursorExpiredError)
+
+def test_evicted_cursor_is_expired():
+    with pytest.raises(CursorExpiredError):
+        next_page(QUERY, encode_cursor("gone", 20), 10)
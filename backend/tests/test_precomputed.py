@@ -0,0 +1,59 @@
+import pytest
+
+from conftest import BRANDS
+
+from app.services import precomputed, recommend, search
+from app.services.precomputed import get_topk_store, save_topk_store
+from app.services.recommend import precompute_brand_top_k, recommend_artists_for_brand
+
+FILTERS = [
+    (gender, lo, hi)
+    for gender in (None, "M", "F")
+    for lo, hi in [(None, None), (20, 30), (30, 60)]
+]
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(precomputed, "PRECOMPUTED_DIR", str(tmp_path / "precomputed"))
+    return tmp_path
+
+def _live(snapshot, brand, top_k, gender, lo, hi):
+    scores = recommend.brand_score_vector(brand, gender, lo, hi, None, snapshot)
+    return recommend._rank_artists(scores, top_k, snapshot)
+
+def test_precomputed_matches_live_ranking(snapshot, store_dir, monkeypatch):
+    combos, indices, sims = precompute_brand_top_k(FILTERS, top_k=5, snapshot=snapshot)
+    save_topk_store(snapshot, combos, indices, sims)
+    monkeypatch.setattr(precomputed, "PRECOMPUTED_TOPK", True)
+    assert get_topk_store(snapshot) is not None
+
+    for brand in BRANDS:
+        for gender, lo, hi in FILTERS:
+            for top_k in (1, 3, 5):
+                served = recommend._precomputed_results(brand, top_k, gender, lo, hi, None, snapshot)
+                assert served is not None
+                if gender is None and lo is None:
+                    assert len(served) == min(top_k, len(snapshot.artist_names))
+                assert served == _live(snapshot, brand, top_k, gender, lo, hi)
+                assert recommend_artists_for_brand(
+                    brand, top_k, gender, lo, hi, snapshot=snapshot
+                ) == served
+
+def test_store_is_ignored_when_search_parameters_change(snapshot, store_dir, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "quantized")
+    monkeypatch.setattr(search, "SEARCH_QUANT_DTYPE", "int8")
+    monkeypatch.setattr(search, "SEARCH_RERANK_K", 3)
+    combos, indices, sims = precompute_brand_top_k(FILTERS, top_k=5, snapshot=snapshot)
+    save_topk_store(snapshot, combos, indices, sims)
+    assert precomputed._load_store(snapshot) is not None
+
+    monkeypatch.setattr(search, "SEARCH_RERANK_K", 4)
+    assert precomputed._load_store(snapshot) is None
+    monkeypatch.setattr(search, "SEARCH_RERANK_K", 3)
+    monkeypatch.setattr(search, "SEARCH_QUANT_DTYPE", "float16")
+    assert precomputed._load_store(snapshot) is None
+    monkeypatch.setattr(search, "SEARCH_QUANT_DTYPE", "int8")
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "exact")
+    assert precomputed._load_store(snapshot) is None
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "quantized")
+    assert precomputed._load_store(snapshot) is not None